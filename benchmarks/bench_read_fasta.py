@@ -0,0 +1,64 @@
+"""
+Benchmark read_fasta on single fixed-width records of increasing length
+
+Run from the repository root:
+    python benchmarks/bench_read_fasta.py [--max-length 100000000] [--width 60]
+
+Parsing should scale linearly, i.e. the time per residue should stay roughly
+constant from the smallest to the largest record.
+"""
+import argparse, os, random, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import AMINO_ACIDS
+from samplesheetutils.utils.fasta import read_fasta
+
+def write_record(path, length, width, seed=0):
+    """
+    Write a single random record of the given length, wrapped every width characters
+    """
+    rng = random.Random(seed)
+    with open(path, "w") as fp:
+        fp.write(">BENCH\n")
+        remaining = length
+        while remaining > 0:
+            line_length = min(width, remaining)
+            fp.write(''.join(rng.choices(AMINO_ACIDS, k=line_length)) + "\n")
+            remaining -= line_length
+
+def time_read(path, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with open(path, "r") as fp:
+            read_fasta(fp, read_data=True, single_line=False)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark read_fasta on records from 1 kb upwards")
+    parser.add_argument('--max-length', type=int, default=100_000_000, dest='max_length')
+    parser.add_argument('--width', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    lengths = []
+    length = 1_000
+    while length <= args.max_length:
+        lengths.append(length)
+        length *= 10
+
+    print(f"{'length':>12} {'seconds':>10} {'ns/residue':>11}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bench.fasta")
+        for length in lengths:
+            write_record(path, length, args.width)
+            # Small records are repeated more often so their timings are not just noise
+            repeat = args.repeat if length >= 1_000_000 else args.repeat * 10
+            elapsed = time_read(path, repeat)
+            print(f"{length:>12} {elapsed:>10.4f} {elapsed / length * 1e9:>11.2f}")
+
+if __name__ == "__main__":
+    main()
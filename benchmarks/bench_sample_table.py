@@ -0,0 +1,44 @@
+"""
+Compare the memory used by a list of Sample objects with a SampleTable holding the same samples
+
+Run from the repository root:
+    python benchmarks/bench_sample_table.py [--samples 200000] [--length 300]
+"""
+import argparse, gc, os, random, sys, tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import AMINO_ACIDS
+from samplesheetutils.utils.sample import Sample, SampleTable
+
+def make_samples(count, length, seed=0):
+    """
+    Yield count samples, as a directory parse would: sequence and name strings are fresh objects for every sample
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        # Monomer files hold several samples each, so paths repeat
+        yield Sample(f"sample_{i}", f"/data/screen/fastas/batch_{i // 4}.fasta", ''.join(rng.choices(AMINO_ACIDS, k=length)), f"/data/screen/msas/sample_{i}.a3m")
+
+def measure(build, count, length):
+    gc.collect()
+    tracemalloc.start()
+    container = build(make_samples(count, length))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del container
+    return current, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare list-of-Sample and SampleTable memory use")
+    parser.add_argument('--samples', type=int, default=200_000)
+    parser.add_argument('--length', type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'container':>12} {'retained MB':>12} {'peak MB':>10} {'bytes/sample':>13}")
+    for label, build in (("list", list), ("SampleTable", SampleTable)):
+        current, peak = measure(build, args.samples, args.length)
+        print(f"{label:>12} {current / 1e6:>12.1f} {peak / 1e6:>10.1f} {current / args.samples:>13.0f}")
+
+if __name__ == "__main__":
+    main()
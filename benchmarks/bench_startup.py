@@ -0,0 +1,44 @@
+"""
+Measure the cold start of a trivial sample-name invocation, end to end
+
+Run from the repository root:
+    python benchmarks/bench_startup.py [--runs 20] [--target-ms 100]
+
+Exits with status 1 if the median start-up time is above the target.
+"""
+import argparse, os, statistics, subprocess, sys, tempfile, time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Time trivial sample-name invocations")
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--target-ms', type=float, default=100.0, dest='target_ms')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fasta_path = os.path.join(tmp_dir, "sample.fasta")
+        with open(fasta_path, "w") as fp:
+            fp.write(">SAMPLE\nMPGAFSQNSSKRRAVLPRSHR\n")
+
+        command = [sys.executable, "-c", "from samplesheetutils.binaries.sample_name import sample_name; sample_name()", fasta_path]
+        environment = dict(os.environ, PYTHONPATH=REPO_ROOT)
+
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            subprocess.run(command, env=environment, check=True, stdout=subprocess.DEVNULL)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        baseline = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", "pass"], check=True)
+            baseline.append((time.perf_counter() - start) * 1000)
+
+    median = statistics.median(timings)
+    print(f"sample-name: median {median:.1f} ms, min {min(timings):.1f} ms (bare interpreter: median {statistics.median(baseline):.1f} ms, target {args.target_ms:.0f} ms)")
+    sys.exit(0 if median <= args.target_ms else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Compare two benchmark result files written by benchmarks.run
+
+    python -m benchmarks.compare old.json new.json [--threshold 0.1]
+
+Exits with status 1 if any stage got slower (or used more memory) by more than the threshold.
+"""
+import argparse, json, sys
+
+def compare(old, new, threshold):
+    """
+    Return a list of (stage, metric, old value, new value, relative change, regressed) for every stage in both results
+    """
+    rows = []
+    for stage, new_result in new["stages"].items():
+        old_result = old["stages"].get(stage)
+        if old_result is None:
+            continue
+        for metric in ("seconds", "peak_rss_kb"):
+            if not old_result.get(metric) or new_result.get(metric) is None:
+                continue
+            change = new_result[metric] / old_result[metric] - 1
+            rows.append((stage, metric, old_result[metric], new_result[metric], change, change > threshold))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Relative increase counted as a regression')
+    args = parser.parse_args()
+
+    with open(args.old, "r") as fp:
+        old = json.load(fp)
+    with open(args.new, "r") as fp:
+        new = json.load(fp)
+
+    if (old["seed"], old["scale"]) != (new["seed"], new["scale"]):
+        print("Warning: results were generated with different corpora (seed/scale)", file=sys.stderr)
+
+    rows = compare(old, new, args.threshold)
+    for stage, metric, old_value, new_value, change, regressed in rows:
+        print(f"{stage:>28} {metric:>12} {old_value:>12.3f} {new_value:>12.3f} {change:>+8.1%}{'  REGRESSION' if regressed else ''}")
+
+    sys.exit(1 if any(i[5] for i in rows) else 0)
+
+if __name__ == "__main__":
+    main()
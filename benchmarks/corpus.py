@@ -0,0 +1,85 @@
+"""
+Deterministic synthetic FASTA corpora for benchmarking
+
+Every corpus is generated from a seed, so two runs with the same seed and scale produce byte-identical files.
+"""
+import os, random
+
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+
+def random_sequence(rng, length):
+    return ''.join(rng.choices(AMINO_ACIDS, k=length))
+
+def write_fasta(path, records, width=None):
+    """
+    Write (name, sequence) records to a FASTA file, wrapping sequences every width characters if width is set
+    """
+    with open(path, "w") as fp:
+        for name, sequence in records:
+            fp.write(f">{name}\n")
+            if width:
+                for i in range(0, len(sequence), width):
+                    fp.write(sequence[i:i+width] + "\n")
+            else:
+                fp.write(sequence + "\n")
+
+def tiny_files(directory, seed=0, count=2000, min_length=50, max_length=500):
+    """
+    Many single-record FASTA files, like a screening directory
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        write_fasta(os.path.join(directory, f"tiny_{i:06d}.fasta"), [(f"tiny_{i:06d}", random_sequence(rng, rng.randint(min_length, max_length)))])
+
+def huge_files(directory, seed=0, count=2, length=5_000_000, width=60):
+    """
+    A few files, each holding one long wrapped record, like genomic contigs
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        write_fasta(os.path.join(directory, f"huge_{i}.fasta"), [(f"huge_{i}", random_sequence(rng, length))], width=width)
+
+def monomer_files(directory, seed=0, count=20, records=2000, min_length=50, max_length=1000):
+    """
+    Multi-record FASTA files, read with --monomer
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        write_fasta(os.path.join(directory, f"monomer_{i:03d}.fasta"), [
+            (f"monomer_{i:03d}_{j:05d}", random_sequence(rng, rng.randint(min_length, max_length))) for j in range(records)
+        ], width=80)
+
+def msa_dir(directory, names, seed=0, coverage=0.8, depth=4):
+    """
+    An MSA directory holding an .a3m file for a share (coverage) of the given sample names
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    for name in names:
+        if rng.random() < coverage:
+            write_fasta(os.path.join(directory, f"{name}.a3m"), [(f"hit_{i}", random_sequence(rng, 60)) for i in range(depth)])
+
+CORPORA = {
+    "tiny": tiny_files,
+    "huge": huge_files,
+    "monomer": monomer_files,
+}
+
+def generate(directory, seed=0, scale=1.0):
+    """
+    Generate every corpus in its own subdirectory of directory, with file counts and lengths multiplied by scale
+    Returns a dictionary mapping corpus names to their directories
+    """
+    corpora = {}
+    for name, kwargs in (
+        ("tiny", {"count": max(1, int(2000 * scale))}),
+        ("huge", {"length": max(1000, int(5_000_000 * scale))}),
+        ("monomer", {"count": max(1, int(20 * scale))}),
+    ):
+        corpora[name] = os.path.join(directory, name)
+        os.makedirs(corpora[name], exist_ok=True)
+        CORPORA[name](corpora[name], seed=seed, **kwargs)
+
+    corpora["msas"] = os.path.join(directory, "msas")
+    msa_dir(corpora["msas"], [f"tiny_{i:06d}" for i in range(max(1, int(2000 * scale)))], seed=seed)
+    return corpora
@@ -0,0 +1,152 @@
+"""
+Time each stage of samplesheet generation on a synthetic corpus, and store the results as JSON
+
+Run from the repository root:
+    python -m benchmarks.run [--seed 0] [--scale 1.0] [--output results.json] [--stage read_monomer ...]
+
+Every stage runs in a fresh process so its peak RSS is not inflated by earlier stages. Compare two result files with
+    python -m benchmarks.compare old.json new.json
+"""
+import argparse, json, os, platform, sys, tempfile, time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from benchmarks import corpus
+from samplesheetutils.utils.directory import find_files, index_msa_dir
+from samplesheetutils.utils.fasta import make_fasta, write_multi_fasta
+from samplesheetutils.utils.output import create_csv, create_json, create_yaml_boltz
+from samplesheetutils.utils.pipeline import parse_files
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+FASTA_REGEX = r".*\.(fa(a)?(sta)?|y(a)?ml).*$"
+
+def _files_size(directory):
+    return sum(os.path.getsize(i) for i in find_files(directory))
+
+def _timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+def discover(corpora, scratch):
+    seconds, paths = _timed(lambda: list(find_files(corpora["tiny"], FASTA_REGEX)))
+    return seconds, len(paths), 0
+
+def _read_stage(corpus_name, read_data, single_line, jobs, lazy=False):
+    def stage(corpora, scratch):
+        seconds, samples = _timed(lambda: sum(1 for _ in parse_files(find_files(corpora[corpus_name], FASTA_REGEX), read_data=read_data, single_line=single_line, jobs=jobs, lazy=lazy)))
+        return seconds, samples, _files_size(corpora[corpus_name])
+    return stage
+
+def msa_lookup(corpora, scratch):
+    seconds, msa_index = _timed(lambda: index_msa_dir(corpora["msas"]))
+    return seconds, len(msa_index), 0
+
+def _load_monomer_samples(corpora):
+    return list(parse_files(find_files(corpora["monomer"], FASTA_REGEX), read_data=True, single_line=False, jobs=1))
+
+def _write_stage(write):
+    def stage(corpora, scratch):
+        samples = _load_monomer_samples(corpora)
+        output_path = os.path.join(scratch, "output")
+        seconds, _ = _timed(lambda: write(samples, output_path, scratch))
+        return seconds, len(samples), os.path.getsize(output_path) if os.path.isfile(output_path) else _files_size(output_path)
+    return stage
+
+def _write_samplesheet(writer):
+    def write(samples, output_path, scratch):
+        with open(output_path, "w") as fp:
+            writer(samples, fp)
+    return write
+
+def _write_per_sample_fasta(jobs):
+    def write(samples, output_path, scratch):
+        os.mkdir(output_path)
+        for sample in samples:
+            sample.path = os.path.join(output_path, f"{sample.name}.fasta")
+        make_fasta(samples, jobs=jobs)
+    return write
+
+STAGES = {
+    "discover": discover,
+    "read_tiny_headers": _read_stage("tiny", read_data=False, single_line=True, jobs=1),
+    "read_tiny_headers_parallel": _read_stage("tiny", read_data=False, single_line=True, jobs=None),
+    "read_huge": _read_stage("huge", read_data=True, single_line=False, jobs=1),
+    "read_huge_lazy": _read_stage("huge", read_data=True, single_line=False, jobs=1, lazy=True),
+    "read_monomer_headers": _read_stage("monomer", read_data=False, single_line=False, jobs=1),
+    "read_monomer": _read_stage("monomer", read_data=True, single_line=False, jobs=1),
+    "msa_lookup": msa_lookup,
+    "make_fasta": _write_stage(_write_per_sample_fasta(jobs=1)),
+    "make_fasta_parallel": _write_stage(_write_per_sample_fasta(jobs=None)),
+    "write_multi_fasta": _write_stage(lambda samples, output_path, scratch: write_multi_fasta(samples, output_path, fixed_width=True)),
+    "create_csv": _write_stage(_write_samplesheet(lambda samples, fp: create_csv(samples, "sequence", "fasta", fp))),
+    "create_json": _write_stage(_write_samplesheet(create_json)),
+    "create_yaml_boltz": _write_stage(_write_samplesheet(create_yaml_boltz)),
+}
+
+def run_stage(name, corpora):
+    """
+    Run a single stage and return its metrics. Meant to be called in a fresh process
+    """
+    with tempfile.TemporaryDirectory() as scratch:
+        seconds, items, size = STAGES[name](corpora, scratch)
+
+    result = {
+        "seconds": seconds,
+        "items": items,
+        "items_per_second": items / seconds if seconds else None,
+        "bytes": size,
+        "bytes_per_second": size / seconds if seconds else None,
+        "peak_rss_kb": None,
+    }
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux, but in bytes on macOS
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result["peak_rss_kb"] = peak_rss // 1024 if sys.platform == "darwin" else peak_rss
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark samplesheetutils on a synthetic corpus")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplier for the number of files and record lengths of the corpus')
+    parser.add_argument('--corpus-dir', dest='corpus_dir', default=None, help='Directory to generate the corpus in. Defaults to a temporary directory')
+    parser.add_argument('--stage', action='append', choices=sorted(STAGES), dest='stages', help='Stage to run. Can be repeated. Defaults to every stage')
+    parser.add_argument('--label', default='', help='Free text stored with the results, e.g. a version or commit')
+    parser.add_argument('--output', default=None, help='JSON file to write the results to')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = args.corpus_dir or tmp_dir
+        corpora = corpus.generate(corpus_dir, seed=args.seed, scale=args.scale)
+
+        results = {}
+        spawn = get_context("spawn")
+        for name in args.stages or STAGES:
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+                results[name] = executor.submit(run_stage, name, corpora).result()
+            print(f"{name:>28} {results[name]['seconds']:>9.3f}s {results[name]['items']:>9} items {results[name]['peak_rss_kb'] or 0:>9} KB peak", file=sys.stderr)
+
+    output = {
+        "label": args.label,
+        "seed": args.seed,
+        "scale": args.scale,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "stages": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(output, fp, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
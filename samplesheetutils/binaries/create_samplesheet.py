@@ -1,24 +1,135 @@
-import argparse, tempfile, logging, os
-from samplesheetutils.utils.sample import *
-from samplesheetutils.utils.output import *
-from samplesheetutils.utils.fasta import *
-from samplesheetutils.utils.input import *
-
-# Consts
-MODE_STRING_CSV = 0
-MODE_DIR_CSV = 1
-MODE_STRING_JSON = 2
-MODE_DIR_JSON = 3
-MODE_STRING_YAML = 4
-MODE_DIR_YAML = 5
-
-# Set up logging
+import argparse, logging, os, sys
+from collections import Counter
+from operator import attrgetter
+from samplesheetutils.utils.directory import INDEX_EXTENSIONS, find_files, index_msa_dir
+from samplesheetutils.utils.pipeline import OUTPUT_EXTENSIONS, string_source, aa_file_source, stdin_source, parse_files, group_by_file, dedupe_samples, attach_msas, replacing_file, write_samplesheet, write_yaml_per_file
+from samplesheetutils.utils.shard import residue_count, shard_samples, shard_path
+from samplesheetutils.utils.validate import SequenceSummary, validate_samples
+from samplesheetutils.utils.stats import Stats, NULL_STATS, report_stats, profiled
+
 logger = logging.getLogger(__name__)
-logging.basicConfig()
 
 def version():
     print("")
 
+def build_samplesheet(args, output_format, stats=NULL_STATS):
+    """
+    Run the samplesheet pipeline for parsed command line arguments
+    """
+    cache = None
+    if args.cache and args.dir:
+        from samplesheetutils.utils.cache import SampleCache
+        cache = SampleCache(args.cache)
+
+    # Each stage is a generator, so samples flow from the source to the samplesheet one at a time.
+    # Sharding is the exception, as every sample's length is needed before the first shard can be written
+    sharded = bool(args.shards or args.max_shard_residues or args.sort_by_length)
+
+    # Source
+    if args.dir:
+        logger.debug(f"Checking {args.dir} for fasta files")
+        # File sizes are looked up once, by discovery, and used again by parse once the file is read
+        file_sizes = {}
+        file_list = stats.wrap("discovery", find_files(args.dir, args.fasta_regex, recursive=args.recursive, exclude=INDEX_EXTENSIONS), unit="files",
+            size=lambda path: file_sizes.setdefault(path, os.path.getsize(path)))
+        # A csv row describes a whole fasta file unless --monomer is set, and only needs its name.
+        # JSON and YAML samplesheets hold every chain, with its sequence, as do validation, deduplication and sharding
+        file_rows = output_format == "csv" and not args.monomer
+        needs_sequences = bool(args.validate or args.dedupe or sharded)
+        samples = stats.wrap("parse", parse_files(
+            file_list,
+            read_data=(output_format != "csv" or needs_sequences),
+            single_line=(file_rows and not needs_sequences),
+            jobs=args.jobs,
+            processes=args.process_pool,
+            cache=cache,
+            # Sequences stay in the mapped files until written. Not when sharding, which holds every sample (and so every mapping) at once
+            lazy=not sharded), size=lambda path: file_sizes.pop(path, 0), file=attrgetter("path"))
+        # Files are checked, deduplicated and weighed on the sequences of all their chains
+        if file_rows and needs_sequences:
+            samples = group_by_file(samples)
+    elif args.stdin:
+        samples = stdin_source(sys.stdin, args.fasta_dir, prefix=args.aa_prefix, suffix=args.aa_suffix, delim=args.delim, extension=args.output_extension, jobs=args.jobs, atomic=args.atomic)
+    elif args.from_sqlite:
+        from samplesheetutils.utils.database import sqlite_source
+        samples = sqlite_source(args.from_sqlite, min_length=args.min_length, max_length=args.max_length)
+    elif args.aa_file:
+        aa_fp = sys.stdin if args.aa_file == "-" else open(args.aa_file, "r")
+        samples = aa_file_source(aa_fp, args.fasta_dir, seq_chars=args.seq_chars, prefix=args.aa_prefix, suffix=args.aa_suffix, delim=args.delim, extension=args.output_extension, jobs=args.jobs, atomic=args.atomic)
+    else:
+        samples = string_source(args.aa_string, args.fasta_dir, seq_chars=args.seq_chars, prefix=args.aa_prefix, suffix=args.aa_suffix, delim=args.delim, extension=args.output_extension, atomic=args.atomic)
+
+    if not args.dir:
+        samples = stats.wrap("source", samples)
+
+    # Enrich. Every sample is validated, then duplicates are dropped, so MSAs are only looked up for the samples that are kept
+    summary = SequenceSummary(composition=args.composition)
+    if args.validate:
+        samples = stats.wrap("validate", validate_samples(samples, strict=(args.validate == "strict"), summary=summary))
+
+    dedupe_counts = Counter()
+    if args.dedupe:
+        mapping_fp = open(args.dedupe_map or os.path.splitext(args.output_file)[0] + ".dedupe.tsv", "w")
+        samples = stats.wrap("dedupe", dedupe_samples(samples, mapping_fp, dedupe_counts))
+
+    # The MSA directory is listed once, up front
+    msa_counts = Counter()
+    if args.msa_dir:
+        with stats.stage("msa_index"):
+            msa_index = index_msa_dir(args.msa_dir, recursive=args.recursive)
+        samples = stats.wrap("msa_lookup", attach_msas(samples, msa_index, msa_counts))
+
+    # Sink. Records are counted as the sink takes them, and files as they are written
+    if not sharded:
+        samples = stats.count("write", samples)
+    if args.yaml_dir:
+        os.makedirs(args.yaml_dir, exist_ok=True)
+        manifest_path = os.path.join(args.yaml_dir, "manifest.tsv")
+        with stats.stage("write"), open(manifest_path, "w") as manifest_fp:
+            documents = write_yaml_per_file(samples, args.dir, args.yaml_dir, manifest_fp, jobs=args.jobs, atomic=args.atomic)
+        stats.add("write", files=documents)
+        logger.info(f"Wrote {documents} YAML files to {args.yaml_dir}, listed in {manifest_path}")
+    elif output_format == "sqlite":
+        from samplesheetutils.utils.database import create_sqlite
+        with stats.stage("write"):
+            create_sqlite(samples, args.output_file)
+        stats.add("write", files=1, bytes_read=os.path.getsize(args.output_file))
+    elif sharded:
+        with stats.stage("shard"):
+            shards = shard_samples(samples, shards=args.shards, max_residues=args.max_shard_residues, sort_by_length=args.sort_by_length)
+        with stats.stage("write"):
+            for i, shard in enumerate(shards):
+                # --sort-by-length alone sorts the single samplesheet
+                path = shard_path(args.output_file, i, len(shards)) if (args.shards or args.max_shard_residues) else args.output_file
+                with replacing_file(path) as ss_fp:
+                    write_samplesheet(shard, output_format, ss_fp, seq_header=args.seq_header, fasta_header=args.fasta_header)
+                stats.add("write", files=1, records=len(shard), bytes_read=os.path.getsize(path))
+        residues = [sum(residue_count(i) for i in shard) for shard in shards]
+        logger.info(f"Wrote {len(shards)} samplesheet(s) of {min(residues)} to {max(residues)} residues")
+    else:
+        with stats.stage("write"), replacing_file(args.output_file) as ss_fp:
+            write_samplesheet(samples, output_format, ss_fp, seq_header=args.seq_header, fasta_header=args.fasta_header)
+        stats.add("write", files=1, bytes_read=os.path.getsize(args.output_file))
+
+    if args.aa_file and args.aa_file != "-":
+        aa_fp.close()
+
+    if args.validate:
+        for line in summary.summary_lines():
+            logger.info(line)
+
+    if args.dedupe:
+        mapping_fp.close()
+        logger.info(f"Kept {dedupe_counts['unique']} unique sequences of {dedupe_counts['unique'] + dedupe_counts['duplicate']} samples ({dedupe_counts['duplicate']} duplicates removed), mapping written to {mapping_fp.name}")
+
+    if cache is not None:
+        evicted = cache.evict_unseen()
+        logger.info(f"Cache: {cache.hits} unchanged files, {cache.misses} parsed, {evicted} removed")
+        cache.close()
+
+    if args.msa_dir:
+        logger.info(f"Found pre-computed MSAs for {msa_counts['found']} of {msa_counts['found'] + msa_counts['missing']} samples ({msa_counts['missing']} missing)")
+
 #if __name__ == "__main__":
 def create_samplesheet():
     parser = argparse.ArgumentParser(
@@ -27,27 +138,51 @@ def create_samplesheet():
         epilog="Written by Nathan Glades <n.glades@unsw.edu.au>")
 
     parser.add_argument('-a', '--aa-string', help='Single amino acid string', dest='aa_string')
+    parser.add_argument('--aa-file', help='File with one amino acid string, or a tab-separated name and amino acid string, per line. Use - for standard input', dest='aa_file')
     parser.add_argument('-m', '--msa-dir', help='Directory containing corresponding MSA files for samples', dest='msa_dir')
     parser.add_argument('-d', '--directory', help='Directory containing fasta files', dest='dir')
+    parser.add_argument('--stdin', help='Read fasta records from standard input. Each record is written to its own file in --fasta-dir', default=False, action='store_true', dest='stdin')
     parser.add_argument('-p', '--prefix', help='Filename prefix for amino acid strings', dest='aa_prefix', default='manual_entry')
     parser.add_argument('-s', '--suffix', help='Filename suffix for amino acid strings', dest='aa_suffix', default='af2')
     parser.add_argument('-u', '--delim', help='Delimiter in between fields of the amino acid string filename', dest='delim', default='-')
-    parser.add_argument('-c', '--seq-chars', help='Number of characters used from the sequence in the filename', dest='seq_chars', default=6)
+    parser.add_argument('-c', '--seq-chars', help='Number of characters used from the sequence in the filename', dest='seq_chars', type=int, default=6)
     parser.add_argument('-o', '--output-file', help='Samplesheet filename', dest='output_file', default='samplesheet.csv')
     parser.add_argument('-x', '--output-extension', help='Extension for string input', default='fasta', dest='output_extension')
     parser.add_argument('-e', '--extension', help='Extension of the files contained in the directory', default='fasta', dest='extension')
     parser.add_argument('-q', '--sequence-header', help='Column name for sequence', default='sequence', dest='seq_header')
     parser.add_argument('-f', '--fasta-header', help='Column name for fasta path', default='fasta', dest='fasta_header')
     parser.add_argument('-j', '--json', help='Output json format instead of csv', action='store_true', dest='json')
+    parser.add_argument('--json-lines', help='Output json lines format (one entity per line) instead of csv', action='store_true', dest='json_lines')
     parser.add_argument('-y', '--yaml', help='Output yaml format instead of csv', action='store_true', dest='yaml')
     parser.add_argument('-t', '--fasta-dir', help='Output directory for temporary fasta files', default=os.getcwd(), dest='fasta_dir')
     parser.add_argument('-r', '--fasta-match', help='Regex to match for fasta files in directory mode', default='.*\.(fa(a)?(sta)?|y(a)?ml).*$', dest='fasta_regex')
+    parser.add_argument('--recursive', help='Also search subdirectories of the directory for fasta files', default=False, action='store_true', dest='recursive')
     parser.add_argument('--monomer', help='Create a samplesheet entry for each sample in a fasta file', default=False, action='store_true', dest='monomer')
+    parser.add_argument('--jobs', help='Number of fasta files read or written in parallel. Defaults to the number of available cores', type=int, default=None, dest='jobs')
+    parser.add_argument('--atomic', help='Write each fasta file under a temporary name and rename it into place', default=False, action='store_true', dest='atomic')
+    parser.add_argument('--process-pool', help='Read fasta files in worker processes instead of threads. Useful for large files', default=False, action='store_true', dest='process_pool')
+    parser.add_argument('--cache', help='Cache of parsed fasta files for directory mode. Only new or modified files are parsed on later runs', default=None, dest='cache')
+    parser.add_argument('--sqlite', help='Output an SQLite samplesheet, indexed on sample name and sequence length, instead of csv', action='store_true', dest='sqlite')
+    parser.add_argument('--from-sqlite', help='Read the samples of an SQLite samplesheet, to export them to another format', default=None, dest='from_sqlite')
+    parser.add_argument('--min-length', help='With --from-sqlite, only export samples with at least this many residues', type=int, default=None, dest='min_length')
+    parser.add_argument('--max-length', help='With --from-sqlite, only export samples with at most this many residues', type=int, default=None, dest='max_length')
+    parser.add_argument('--yaml-per-file', help='Directory to write a yaml file for every fasta file to, with the records of each file as the chains of one complex, and a manifest.tsv listing them. Replaces the samplesheet', default=None, dest='yaml_dir')
+    parser.add_argument('--validate', help='Check that every sequence is made of amino acid letters. strict stops at the first invalid sequence, warn only logs it', choices=['strict', 'warn'], default=None, dest='validate')
+    parser.add_argument('--composition', help='With --validate, also report the residue composition of all sequences. Slower than the other checks', default=False, action='store_true', dest='composition')
+    parser.add_argument('--dedupe', help='Only list the first sample of every distinct sequence', default=False, action='store_true', dest='dedupe')
+    parser.add_argument('--dedupe-map', help='Tab-separated file mapping every sample to the sample kept for its sequence. Defaults to the samplesheet filename with a .dedupe.tsv extension', default=None, dest='dedupe_map')
+    parser.add_argument('--shards', help='Split the samplesheet into this many samplesheets of balanced total sequence length', type=int, default=None, dest='shards')
+    parser.add_argument('--max-residues-per-shard', help='Split the samplesheet into as few samplesheets as possible of at most this many residues each', type=int, default=None, dest='max_shard_residues')
+    parser.add_argument('--sort-by-length', help='Order the samples of each samplesheet from longest to shortest sequence', default=False, action='store_true', dest='sort_by_length')
+    parser.add_argument('--stats', help='Print the time, throughput and memory use of each stage to stderr', default=False, action='store_true', dest='stats')
+    parser.add_argument('--stats-json', help='Write the time, throughput and memory use of each stage to a JSON file', default=None, dest='stats_json')
+    parser.add_argument('--profile', help='Write cProfile statistics of the run to a file', default=None, dest='profile')
     parser.add_argument('--version', help='Show version number', default=False, action='store_true', dest='version')
     parser.add_argument('--debug', help='Show debug output', default=False, action='store_true', dest='debug')
 
     args = parser.parse_args()
 
+    logging.basicConfig()
     if args.debug:
         logger.setLevel(logging.DEBUG)
     else:
@@ -61,137 +196,41 @@ def create_samplesheet():
         version()
 
     # Validate that an input was provided
-    if (not args.aa_string and not args.dir):
-        raise ValueError("You must specify an amino acid string or a directory")
+    if (not args.aa_string and not args.aa_file and not args.dir and not args.stdin and not args.from_sqlite):
+        raise ValueError("You must specify an amino acid string, an amino acid file, a directory, --stdin or --from-sqlite")
 
-    # Validate that seq_chars is an int
-    if (type(args.seq_chars) is not int):
-        raise ValueError("seq_chars is not a number")
-
-    if (args.json and args.yaml):
+    if ((args.json or args.json_lines) and args.yaml):
         raise ValueError("Invaid mode combination. You cannot set --json and --yaml at the same time")
 
-    # Mode
-    mode = 0
-    mode |= bool(args.dir)
-    mode |= args.json << 1
-    mode |= args.yaml << 2
-    logger.debug(f"mode: {mode}")
-    logger.debug("Will attempt to locate MSAs" if args.msa_dir else "Will NOT attempt to locate MSAs")
-
-    if mode == MODE_STRING_CSV:
-        # Generate metadata for AA string
-        aa_sample_name = sample_name(args.aa_string, seq_chars=args.seq_chars)
-        aa_sample_file_name = file_name(aa_sample_name, prefix=args.aa_prefix, suffix=args.aa_suffix, extension=args.output_extension)
-        aa_path = args.fasta_dir + "/" + aa_sample_file_name
-
-        # Create the fasta file
-        sample_data = Sample(aa_sample_name, aa_path, args.aa_string)
-        make_fasta(sample_data)
-
-        # Write the samplesheet
-        samplesheet_path = args.output_file
-        with open(samplesheet_path, "w") as ss_fp:
-            create_csv([sample_data], args.seq_header, args.fasta_header, ss_fp)
-
-    if mode == MODE_STRING_JSON:
-        # Generate metadata for AA string
-        aa_sample_name = sample_name(args.aa_string, seq_chars=args.seq_chars)
-        aa_sample_file_name = file_name(aa_sample_name, prefix=args.aa_prefix, suffix=args.aa_suffix, extension=args.output_extension)
-        aa_path = args.fasta_dir + "/" + aa_sample_file_name
+    if args.sqlite and (args.json or args.json_lines or args.yaml or args.yaml_dir or args.shards or args.max_shard_residues or args.sort_by_length):
+        raise ValueError("Invaid mode combination. --sqlite cannot be combined with another output format or with sharding")
 
-        # Create the fasta file
-        sample_data = Sample(aa_sample_name, aa_path, args.aa_string)
-        make_fasta(sample_data)
+    if args.shards and args.max_shard_residues:
+        raise ValueError("Invaid mode combination. You cannot set --shards and --max-residues-per-shard at the same time")
 
-        if args.output_file == "samplesheet.csv":
-            args.output_file = args.output_file.replace(".csv", ".json")
-        samplesheet_path = args.output_file
+    if args.yaml_dir and not args.dir:
+        raise ValueError("--yaml-per-file needs a directory of fasta files (--directory)")
 
-        with open(samplesheet_path, "w") as ss_fp:
-            create_json([sample_data], ss_fp)
+    if args.yaml_dir and (args.dedupe or args.shards or args.max_shard_residues or args.sort_by_length or args.json or args.json_lines):
+        raise ValueError("Invaid mode combination. --yaml-per-file writes every chain of every file, and cannot be combined with --dedupe, sharding or --json")
 
-    if mode == MODE_STRING_YAML:
-        # Generate metadata for AA string
-        aa_sample_name = sample_name(args.aa_string, seq_chars=args.seq_chars)
-        aa_sample_file_name = file_name(aa_sample_name, prefix=args.aa_prefix, suffix=args.aa_suffix, extension=args.output_extension)
-        aa_path = args.fasta_dir + "/" + aa_sample_file_name
-
-        # Create the fasta file
-        sample_data = Sample(aa_sample_name, aa_path, args.aa_string)
-        make_fasta(sample_data)
-
-        if args.output_file == "samplesheet.csv":
-            args.output_file = args.output_file.replace(".csv", ".yaml")
-        samplesheet_path = args.output_file
-
-        with open(samplesheet_path, "w") as ss_fp:
-            create_yaml_boltz([sample_data], ss_fp)
-
-
-    if mode == MODE_DIR_CSV:
-        logger.debug(f"Checking {args.dir} for fasta files")
-        file_list = [os.path.join(args.dir, f) for f in os.listdir(args.dir) if os.path.isfile(os.path.join(args.dir, f))]
-        logger.debug(f"Fasta files: {file_list}")
-        file_list = [i for i in file_list if re.search(args.fasta_regex, i)]
-        logger.debug(f"File list aginst regex: {file_list}")
-        sample_data = []
-
-        samplesheet_path = args.output_file
-
-        for file_name in file_list:
-            with open(file_name, "r") as fp:
-                fasta_data = read_fasta(fp, read_data=True, single_line=(not args.monomer))
-                sample_data.extend(fasta_data)
-                logger.debug(f"Added sample {file_name}, {fasta_data}")
-
-        samplesheet_path = args.output_file
-        logger.debug(f"Sample data array length: {len(sample_data)}")
-        with open(samplesheet_path, "w") as ss_fp:
-            create_csv(sample_data, args.seq_header, args.fasta_header, ss_fp)
-
-    if mode == MODE_DIR_JSON:
-        file_list = [os.path.join(args.dir, f) for f in os.listdir(args.dir) if os.path.isfile(os.path.join(args.dir, f)) and re.search(args.fasta_regex, f)]
-        sample_data = []
-
-        for file_name in file_list:
-            with open(file_name, "r") as file_fp:
-                sample_data.extend(read_fasta(file_fp, read_data=True, single_line=False))
-
-        samplesheet_path = args.output_file
+    if args.sqlite:
+        output_format = "sqlite"
+    elif args.yaml or args.yaml_dir:
+        output_format = "yaml"
+    elif args.json_lines:
+        output_format = "jsonl"
+    elif args.json:
+        output_format = "json"
+    else:
+        output_format = "csv"
+    logger.debug(f"Output format: {output_format}")
+    logger.debug("Will attempt to locate MSAs" if args.msa_dir else "Will NOT attempt to locate MSAs")
 
-    if mode == MODE_DIR_YAML:
-        logger.debug(f"Checking {args.dir} for fasta files")
-        file_list = [os.path.join(args.dir, f) for f in os.listdir(args.dir) if os.path.isfile(os.path.join(args.dir, f))]
-        logger.debug(f"Fasta files: {file_list}")
-        file_list = [i for i in file_list if re.search(args.fasta_regex, i)]
-        logger.debug(f"File list aginst regex: {file_list}")
-        sample_data = []
-
-        for file_name in file_list:
-            with open(file_name, "r") as fp:
-                fasta_data = read_fasta(fp, read_data=True, single_line=False)
-                # Attempt to find MSA if the MSA directory flag is set
-                if args.msa_dir:
-                    logger.debug(f"Searching for MSAs of {file_name}")
-                    for fsi, i in zip(fasta_data, range(len(fasta_data))):
-                        logger.debug("Checking for " + os.path.join(args.msa_dir, f"{fsi.name}.m3a"))
-                        if os.path.isfile(os.path.join(args.msa_dir, f"{fsi.name}.m3a")):
-                                fasta_data[i].msa = os.path.join(args.msa_dir, f"{fsi.name}.m3a")
-                                logger.debug(f"Added pre-computed MSA for sample {fsi.name} of {file_name}: {fsi.msa}")
-                        else:
-                            logger.debug(f"Corresponding MSA for sample {fsi.name} of {file_name} was not found, despite --msa-dir being set. Expected file name is {fsi.name}.m3a. Continuing with no MSA...") 
-                sample_data.extend(fasta_data)
-                logger.debug(f"Added sample {file_name}, {fasta_data}")
-                logger.debug(f"Sample data {sample_data[-1].data}")
-
-        if args.output_file == "samplesheet.csv":
-            args.output_file = args.output_file.replace(".csv", ".yaml")
-        samplesheet_path = args.output_file
-
-
-
-        samplesheet_path = args.output_file
-        with open(samplesheet_path, "w") as ss_fp:
-            create_yaml_boltz(sample_data, ss_fp)
+    if args.output_file == "samplesheet.csv":
+        args.output_file = "samplesheet" + (".sqlite" if output_format == "sqlite" else OUTPUT_EXTENSIONS[output_format])
 
+    stats = Stats() if (args.stats or args.stats_json) else NULL_STATS
+    with profiled(args.profile):
+        build_samplesheet(args, output_format, stats)
+    report_stats(stats, summary=args.stats, json_path=args.stats_json)
@@ -1,9 +1,13 @@
-import argparse, tempfile, logging, os
-from samplesheetutils.utils.fasta import *
-from samplesheetutils.utils.input import *
+from itertools import groupby
+import argparse, logging, os
+from samplesheetutils.utils.sample import Sample
+from samplesheetutils.utils.fasta import read_fasta
+from samplesheetutils.utils.compression import open_fasta
+from samplesheetutils.utils.input import sanitize_many, sanitize_collisions
+from samplesheetutils.utils.index import load_fai, read_indexed
+from samplesheetutils.utils.stats import Stats, NULL_STATS, report_stats, profiled
 
 logger = logging.getLogger(__name__)
-logging.basicConfig()
 
 def check_int(s):
     if s[0] in ('-', '+'):
@@ -11,40 +15,45 @@ def check_int(s):
     return s.isdigit()
     # https://stackoverflow.com/questions/1265665/how-can-i-check-if-a-string-represents-an-int-without-using-try-except
 
-def sample_name():
-    parser = argparse.ArgumentParser(
-        prog="Read sample name(s) from FASTA",
-        description="Utility to read the sample name(s) from a FASTA file and print them to stdout",
-        epilog="Written by Nathan Glades <n.glades@unsw.edu.au>"
-    )
-    
-    parser.add_argument('-i', '--index', help='Index of the sample you wish to output.\nIf unset, all sample names will be output. Acceptable inputs are an integer, -1 for the last sample, or a range (a:b)', default=None, dest='index')
-    parser.add_argument('--debug', help='Enables debug output', default=False, action='store_true', dest='debug')
-    parser.add_argument('--sanitize', '--sanitise', help='Enables input sanititation on sample names (usefull for passing to a bash command)', default=False, action='store_true', dest='sani')
-    parser.add_argument('-d', '--delim', help='Delimiter between each sample name', default='\n', dest='delim')
-    parser.add_argument('fasta', nargs='*')
-    args = parser.parse_args()
-
-    if args.debug:
-        logger.setLevel(logging.DEBUG)
-    else:
-        logger.setLevel(logging.INFO)
-
+def print_sample_names(args, stats=NULL_STATS):
+    """
+    Print the sample names, or sequences, selected by parsed command line arguments
+    """
     logger.debug(f'Input file(s): {args.fasta}')
 
     samples = []
-    for sample in args.fasta:
-        with open(sample, "r") as sample_fp:
-            samples.extend(read_fasta(sample_fp, single_line=False))
+    # Index entry of every sample read from an index, or None, to read the sequences of the selected samples only
+    entries = []
+    with stats.stage("read"):
+        for sample in args.fasta:
+            file_samples = None
+            file_entries = None
+            # Selecting samples by index only needs the names and order of the records, which the .ssidx index holds
+            if args.index and not args.no_index:
+                try:
+                    file_entries = load_fai(sample)
+                    file_samples = [Sample(i.name, sample, "") for i in file_entries]
+                except ValueError as e:
+                    logger.debug(f'Could not index {sample}, reading it instead: {e}')
+            if file_samples is None:
+                with open_fasta(sample) as sample_fp:
+                    file_samples = read_fasta(sample_fp, read_data=args.sequences, single_line=False)
+                file_entries = [None] * len(file_samples)
+            samples.extend(file_samples)
+            entries.extend(file_entries)
+            if stats.enabled:
+                stats.add("read", files=1, records=len(file_samples), bytes_read=os.path.getsize(sample))
 
     if len(samples) == 0:
         print()
         exit(0)
 
+    # Positions of the selected samples
+    selected = list(range(len(samples)))
     if args.index:
         if check_int(args.index):
             try:
-                samples = [samples[int(args.index)]]
+                selected = [selected[int(args.index)]]
             except IndexError:
                 logging.error(f'Index {args.index} out of range (range is 0-{str(len(samples))})')
                 exit(1)
@@ -53,17 +62,65 @@ def sample_name():
             index_ints = [int(i) for i in args.index.split(':')]
             try:
                 if len(index_ints) == 1:
-                    samples = samples[index_ints[0]:]
+                    selected = selected[index_ints[0]:]
                 else:
-                    samples = samples[index_ints[0]:index_ints[1]]
+                    selected = selected[index_ints[0]:index_ints[1]]
             except IndexError:
                 logging.error(f'Index {args.index} out of range (range is 0-{str(len(samples))})')
                 exit(1)
         else:
             logging.error(f'Invalid index input: {args.index}')
             exit(1)
+
+    if args.sequences:
+        with stats.stage("read"):
+            # Indexed samples are read by seeking straight to their records, through the .gzi block index for BGZF files
+            for (path, indexed), positions in groupby(selected, key=lambda i: (samples[i].path, entries[i] is not None)):
+                positions = list(positions)
+                if indexed:
+                    for position, indexed_sample in zip(positions, read_indexed(path, [entries[i] for i in positions])):
+                        samples[position] = indexed_sample
+    samples = [samples[i] for i in selected]
+
+    with stats.stage("output"):
+        if args.sequences:
+            print(args.delim.join([i.data for i in samples]))
+        elif args.sani:
+            names = [i.name for i in samples]
+            for sanitized, originals in sanitize_collisions(names).items():
+                logger.warning(f'Sample names {originals} are all sanitised to {sanitized}')
+            print(args.delim.join(sanitize_many(names)))
+        else:
+            print(args.delim.join([i.name for i in samples]))
+
+def sample_name():
+    parser = argparse.ArgumentParser(
+        prog="Read sample name(s) from FASTA",
+        description="Utility to read the sample name(s) from a FASTA file and print them to stdout",
+        epilog="Written by Nathan Glades <n.glades@unsw.edu.au>"
+    )
     
-    if args.sani:
-        print(args.delim.join([sanitize_input(i.name) for i in samples]))
+    parser.add_argument('-i', '--index', help='Index of the sample you wish to output.\nIf unset, all sample names will be output. Acceptable inputs are an integer, -1 for the last sample, or a range (a:b)', default=None, dest='index')
+    parser.add_argument('--debug', help='Enables debug output', default=False, action='store_true', dest='debug')
+    parser.add_argument('--sanitize', '--sanitise', help='Enables input sanititation on sample names (usefull for passing to a bash command)', default=False, action='store_true', dest='sani')
+    parser.add_argument('-d', '--delim', help='Delimiter between each sample name', default='\n', dest='delim')
+    parser.add_argument('-s', '--sequences', help='Print the amino acid sequences of the selected samples instead of their names. With --index, only the selected records are read', default=False, action='store_true', dest='sequences')
+    parser.add_argument('--no-index', help='Do not read or write .ssidx indexes when an index is requested', default=False, action='store_true', dest='no_index')
+    parser.add_argument('--stats', help='Print the time, throughput and memory use of each stage to stderr', default=False, action='store_true', dest='stats')
+    parser.add_argument('--stats-json', help='Write the time, throughput and memory use of each stage to a JSON file', default=None, dest='stats_json')
+    parser.add_argument('--profile', help='Write cProfile statistics of the run to a file', default=None, dest='profile')
+    parser.add_argument('fasta', nargs='*')
+    args = parser.parse_args()
+
+    logging.basicConfig()
+    if args.debug:
+        logger.setLevel(logging.DEBUG)
     else:
-        print(args.delim.join([i.name for i in samples]))
+        logger.setLevel(logging.INFO)
+
+    stats = Stats() if (args.stats or args.stats_json) else NULL_STATS
+    try:
+        with profiled(args.profile):
+            print_sample_names(args, stats)
+    finally:
+        report_stats(stats, summary=args.stats, json_path=args.stats_json)
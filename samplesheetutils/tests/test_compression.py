@@ -0,0 +1,127 @@
+import unittest, os, sys, bz2, gzip, lzma, struct, zlib
+from samplesheetutils.utils.compression import *
+from samplesheetutils.utils.fasta import read_fasta, read_fasta_files
+from samplesheetutils.utils.index import build_fai, load_fai, load_gzi, read_indexed
+
+FASTA = b">TEST\nMPGAF\nSQNSS\nKR\n>DEMO\nAAAAAA\n>LAST\nCCCCC\nCC\n"
+
+def write_bgzf(path, data, block_size):
+    """
+    Write data as BGZF, the way bgzip does, with block_size uncompressed bytes per block and the empty end of file block
+    """
+    with open(path, "wb") as fp:
+        for chunk in [data[i:i+block_size] for i in range(0, len(data), block_size)] + [b""]:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+            deflated = compressor.compress(chunk) + compressor.flush()
+            fp.write(b"\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00")
+            fp.write(struct.pack("<H", len(deflated) + 25))
+            fp.write(deflated)
+            fp.write(struct.pack("<II", zlib.crc32(chunk), len(chunk)))
+
+class TestCompression(unittest.TestCase):
+    paths = (".tmp.fasta.gz", ".tmp.fasta.gz.ssidx", ".tmp.fasta.gz.gzi", ".tmp.fasta.bz2", ".tmp.fasta.xz", ".tmp.fasta")
+
+    def tearDown(self):
+        for path in self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_detect_compression(self):
+        """
+        Tests that compression is detected from the file contents
+        """
+        for path, opener, expected in ((".tmp.fasta.gz", gzip.open, "gzip"), (".tmp.fasta.bz2", bz2.open, "bz2"), (".tmp.fasta.xz", lzma.open, "xz")):
+            with opener(path, "wb") as fp:
+                fp.write(FASTA)
+            self.assertEqual(detect_compression(path), expected)
+
+        write_bgzf(".tmp.fasta.gz", FASTA, 16)
+        self.assertEqual(detect_compression(".tmp.fasta.gz"), "bgzf")
+
+        with open(".tmp.fasta", "wb") as fp:
+            fp.write(FASTA)
+        self.assertIsNone(detect_compression(".tmp.fasta"))
+
+    def test_read_compressed_fasta(self):
+        """
+        Tests that compressed FASTA files read the same as plain ones, with the compressed file as the sample path
+        """
+        for path, opener in ((".tmp.fasta.gz", gzip.open), (".tmp.fasta.bz2", bz2.open), (".tmp.fasta.xz", lzma.open)):
+            with opener(path, "wb") as fp:
+                fp.write(FASTA)
+
+            for read_data in (False, True):
+                samples = read_fasta(open_fasta(path), read_data=read_data, single_line=False)
+                self.assertEqual([i.name for i in samples], ["TEST", "DEMO", "LAST"])
+                self.assertEqual(samples[0].path, path)
+                if read_data:
+                    self.assertEqual(samples[0].data, "MPGAFSQNSSKR")
+
+        samples = next(read_fasta_files([".tmp.fasta.xz"], read_data=True, single_line=False, jobs=1))
+        self.assertEqual(samples[2].data, "CCCCCCC")
+
+    def test_index_not_saved_for_gzip(self):
+        """
+        Tests that the record index of a plain gzip file is built but not saved, as the file cannot be seeked into
+        """
+        with gzip.open(".tmp.fasta.gz", "wb") as fp:
+            fp.write(FASTA)
+
+        self.assertEqual([i.name for i in load_fai(".tmp.fasta.gz")], ["TEST", "DEMO", "LAST"])
+        self.assertFalse(os.path.exists(".tmp.fasta.gz.ssidx"))
+
+        write_bgzf(".tmp.fasta.gz", FASTA, 16)
+        load_fai(".tmp.fasta.gz")
+        self.assertTrue(os.path.exists(".tmp.fasta.gz.ssidx"))
+
+    def test_open_fasta_opens_once(self):
+        """
+        Tests that open_fasta opens each file once, detecting its compression from the buffer of the open file
+        """
+        opened = []
+        sys.addaudithook(lambda event, args: opened.append(args[0]) if event == "open" and args[0] in self.paths else None)
+
+        with gzip.open(".tmp.fasta.gz", "wb") as fp:
+            fp.write(FASTA)
+        with open(".tmp.fasta", "wb") as fp:
+            fp.write(FASTA)
+
+        for path in (".tmp.fasta.gz", ".tmp.fasta"):
+            opened.clear()
+            with open_fasta(path) as fp:
+                self.assertEqual([i.name for i in read_fasta(fp)], ["TEST"])
+            self.assertEqual(opened, [path])
+
+        with open_fasta(".tmp.fasta.gz", "rb") as fp:
+            fp.seek(27)
+            self.assertEqual(fp.read(6), b"AAAAAA")
+        self.assertTrue(fp.closed)
+
+    def test_bgzf_random_access(self):
+        """
+        Tests that records of a BGZF file are read through its .fai and .gzi indexes, across block boundaries
+        """
+        write_bgzf(".tmp.fasta.gz", FASTA, 16)
+
+        entries = load_fai(".tmp.fasta.gz")
+        self.assertEqual(entries, build_fai(".tmp.fasta.gz"))
+        self.assertEqual(len(load_gzi(".tmp.fasta.gz")), 4)
+        self.assertTrue(os.path.isfile(".tmp.fasta.gz.gzi"))
+
+        samples = list(read_indexed(".tmp.fasta.gz", [entries[2], entries[0]]))
+        self.assertEqual([(i.name, i.data) for i in samples], [("LAST", "CCCCCCC"), ("TEST", "MPGAFSQNSSKR")])
+
+    def test_bgzf_reader(self):
+        """
+        Tests that BgzfReader returns the same bytes as decompressing the whole file
+        """
+        data = bytes(range(256)) * 10
+        write_bgzf(".tmp.fasta.gz", data, 100)
+
+        with BgzfReader(".tmp.fasta.gz", load_gzi(".tmp.fasta.gz", write=False)) as fp:
+            for offset, size in ((0, 10), (95, 10), (250, 500), (2550, 100)):
+                fp.seek(offset)
+                self.assertEqual(fp.read(size), data[offset:offset + size])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -37,3 +37,33 @@ class TestCreateJSON(unittest.TestCase):
 
         self.assertEqual(fp_data, '{"entities": [{"type": "protein", "sequence": "AAAAAA", "count": "1"}, {"type": "protein", "sequence": "AAAAAA", "count": "1"}, {"type": "protein", "sequence": "AAAAAA", "count": "1"}]}')
         os.remove(".tmp.json")
+
+    def test_create_json_no_samples(self):
+        """
+        Tests create_json without any samples
+        """
+        with open(".tmp.json", "w") as fp:
+            create_json(iter([]), fp)
+
+        fp = open(".tmp.json", "r")
+        fp_data = fp.read()
+        fp.close()
+
+        self.assertEqual(json.loads(fp_data), {"entities": []})
+        os.remove(".tmp.json")
+
+    def test_create_jsonl_multiple_sample(self):
+        """
+        Tests create_jsonl with samples streamed from a generator
+        """
+        sample_input = (Sample(f"TEST{i}", f".tmp{i}.fasta", "AAAAAA") for i in range(3))
+
+        with open(".tmp.jsonl", "w") as fp:
+            create_jsonl(sample_input, fp)
+
+        fp = open(".tmp.jsonl", "r")
+        fp_data = fp.read()
+        fp.close()
+
+        self.assertEqual(fp_data, '{"type": "protein", "sequence": "AAAAAA", "count": "1"}\n' * 3)
+        os.remove(".tmp.jsonl")
@@ -62,3 +62,78 @@ class TestCreateYAML(unittest.TestCase):
         os.remove(".tmp.yaml")
     
 
+    def test_create_yaml_from_generator(self):
+        """
+        Tests create_yaml_boltz with samples streamed from a generator
+        """
+        sample_input = (Sample(f"TEST{i}", f".tmp{i}.fasta", "AAAAAA") for i in range(2))
+
+        with open(".tmp.yaml", "w") as fp:
+            create_yaml_boltz(sample_input, fp)
+
+        fp = open(".tmp.yaml", "r")
+        fp_data = fp.read()
+        fp.close()
+
+        self.assertEqual(fp_data, "sequences:\n- protein:\n    id: TEST\n    sequence: AAAAAA\n- protein:\n    id: TEST\n    sequence: AAAAAA\nversion: 1\n")
+        os.remove(".tmp.yaml")
+
+    def test_create_yaml_matches_yaml_dump(self):
+        """
+        Tests that create_yaml_boltz matches yaml.dump for values PyYAML has to quote
+        """
+        sample_input = []
+        sample_input.append(Sample("NO", ".tmp1.fasta", "Y", "msas/with space.a3m"))
+        sample_input.append(Sample("1234", ".tmp2.fasta", "AAAAAA"))
+        sample_input.append(Sample("a: b", ".tmp3.fasta", "AAAAAA", "null"))
+
+        expected = {"version": 1, "sequences": []}
+        for row in sample_input:
+            expected["sequences"].append({"protein": {"id": row.name[:4], "sequence": row.data}})
+            if row.msa:
+                expected["sequences"][-1]["protein"]["msa"] = row.msa
+
+        with open(".tmp.yaml", "w") as fp:
+            create_yaml_boltz(sample_input, fp)
+
+        fp = open(".tmp.yaml", "r")
+        fp_data = fp.read()
+        fp.close()
+
+        self.assertEqual(fp_data, yaml.dump(expected, default_flow_style=False))
+        self.assertEqual(yaml.safe_load(fp_data), expected)
+        os.remove(".tmp.yaml")
+
+    def test_create_yaml_chain_ids(self):
+        """
+        Tests that create_yaml_boltz gives unique chain ids A, B, C... when asked, quoting those YAML would read as booleans (N, Y)
+        """
+        sample_input = [Sample(f"TEST{i}", ".tmp.fasta", "AAAAAA") for i in range(30)]
+
+        with open(".tmp.yaml", "w") as fp:
+            create_yaml_boltz(sample_input, fp, chain_ids=True)
+
+        fp = open(".tmp.yaml", "r")
+        fp_data = fp.read()
+        fp.close()
+
+        ids = [chain_id(i) for i in range(30)]
+        self.assertEqual(ids[:3] + ids[25:28], ["A", "B", "C", "Z", "AA", "AB"])
+        expected = {"version": 1, "sequences": [{"protein": {"id": i, "sequence": "AAAAAA"}} for i in ids]}
+        self.assertEqual(fp_data, yaml.dump(expected, default_flow_style=False))
+        self.assertEqual(yaml.safe_load(fp_data), expected)
+        os.remove(".tmp.yaml")
+
+    def test_create_yaml_no_samples(self):
+        """
+        Tests create_yaml_boltz without any samples
+        """
+        with open(".tmp.yaml", "w") as fp:
+            create_yaml_boltz([], fp)
+
+        fp = open(".tmp.yaml", "r")
+        fp_data = fp.read()
+        fp.close()
+
+        self.assertEqual(fp_data, "sequences: []\nversion: 1\n")
+        os.remove(".tmp.yaml")
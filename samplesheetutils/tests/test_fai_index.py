@@ -0,0 +1,124 @@
+import unittest, os
+from samplesheetutils.utils.index import *
+
+class TestFaiIndex(unittest.TestCase):
+    def tearDown(self):
+        for path in (".tmp.fasta", ".tmp.fasta.ssidx", ".tmp.fasta.fai"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_build_fai(self):
+        """
+        Tests build_fai against the values samtools faidx produces
+        """
+        fp = open(".tmp.fasta", "w")
+        fp.write(">TEST\nMPGAF\nSQNSS\nKR\n>DEMO\nAAAAAA\n")
+        fp.close()
+
+        entries = build_fai(".tmp.fasta")
+
+        self.assertEqual(entries, [
+            FaiEntry("TEST", 12, 6, 5, 6),
+            FaiEntry("DEMO", 6, 27, 6, 7),
+        ])
+
+    def test_build_fai_uneven_lines(self):
+        """
+        Tests that build_fai rejects records whose lines differ in length
+        """
+        fp = open(".tmp.fasta", "w")
+        fp.write(">TEST\nMPG\nAFSQNSS\n")
+        fp.close()
+
+        with self.assertRaises(ValueError):
+            build_fai(".tmp.fasta")
+
+    def test_load_fai_writes_and_reuses_index(self):
+        """
+        Tests that load_fai saves the index and reads it back on the next call
+        """
+        fp = open(".tmp.fasta", "w")
+        fp.write(">TEST\nMPGAF\nSQNSS\n>DEMO\nAAAAAA\n")
+        fp.close()
+
+        entries = load_fai(".tmp.fasta")
+        self.assertTrue(os.path.isfile(".tmp.fasta.ssidx"))
+
+        # Tamper with the saved index, keeping its stamp, so reuse is observable
+        with open(".tmp.fasta.ssidx", "r") as fp:
+            stamp = fp.readline()
+        with open(".tmp.fasta.ssidx", "w") as fp:
+            fp.write(stamp)
+            write_fai([entries[0]._replace(name="CACHED"), entries[1]], fp)
+
+        self.assertEqual(load_fai(".tmp.fasta")[0].name, "CACHED")
+
+        # An index cut short, as a concurrent reader of an in-place write would see, is rebuilt
+        with open(".tmp.fasta.ssidx", "w") as fp:
+            fp.write(stamp)
+            write_fai([entries[0]._replace(name="CACHED")], fp)
+
+        self.assertEqual(load_fai(".tmp.fasta"), entries)
+        self.assertEqual([i for i in os.listdir(".") if i.startswith(".tmp.fasta.ssidx.")], [])
+
+    def test_load_fai_ignores_samtools_index(self):
+        """
+        Tests that a samtools .fai index, which only holds the first word of each header, is neither read nor overwritten
+        """
+        fp = open(".tmp.fasta", "w")
+        fp.write(">TEST protein\nMPGAF\n")
+        fp.close()
+        fp = open(".tmp.fasta.fai", "w")
+        fp.write("TEST\t5\t14\t5\t6\n")
+        fp.close()
+
+        self.assertEqual([i.name for i in load_fai(".tmp.fasta")], ["TEST protein"])
+        with open(".tmp.fasta.fai", "r") as fp:
+            self.assertEqual(fp.read(), "TEST\t5\t14\t5\t6\n")
+
+    def test_load_fai_rebuilds_stale_index(self):
+        """
+        Tests that load_fai ignores an index older than its FASTA file
+        """
+        fp = open(".tmp.fasta", "w")
+        fp.write(">TEST\nMPGAF\n")
+        fp.close()
+        load_fai(".tmp.fasta")
+        os.utime(".tmp.fasta.ssidx", (0, 0))
+
+        fp = open(".tmp.fasta", "w")
+        fp.write(">DEMO\nAAAAAA\n")
+        fp.close()
+
+        self.assertEqual([i.name for i in load_fai(".tmp.fasta")], ["DEMO"])
+
+    def test_load_fai_rebuilds_backdated_replacement(self):
+        """
+        Tests that load_fai rebuilds the index when the FASTA file is replaced by one with an older modification time (cp -p, rsync)
+        """
+        fp = open(".tmp.fasta", "w")
+        fp.write(">NEW\nMPGAFSQNSS\n")
+        fp.close()
+        load_fai(".tmp.fasta")
+
+        fp = open(".tmp.fasta", "w")
+        fp.write(">OLD\nAAAAAA\n>SECOND\nMMMM\n")
+        fp.close()
+        os.utime(".tmp.fasta", (0, 0))
+
+        entries = load_fai(".tmp.fasta")
+        self.assertEqual([i.name for i in entries], ["OLD", "SECOND"])
+        self.assertEqual([i.data for i in read_indexed(".tmp.fasta", entries)], ["AAAAAA", "MMMM"])
+
+    def test_read_indexed(self):
+        """
+        Tests that read_indexed seeks straight to the requested records
+        """
+        fp = open(".tmp.fasta", "w")
+        fp.write(">TEST\r\nMPGAF\r\nSQNSS\r\nKR\r\n>DEMO\nAAAAAA\n>LAST\nMMMM")
+        fp.close()
+
+        entries = build_fai(".tmp.fasta")
+        samples = list(read_indexed(".tmp.fasta", [entries[2], entries[0]]))
+
+        self.assertEqual([(i.name, i.data) for i in samples], [("LAST", "MMMM"), ("TEST", "MPGAFSQNSSKR")])
@@ -0,0 +1,39 @@
+import unittest, os, re, tempfile
+from samplesheetutils.utils.directory import *
+
+class TestFindFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.mkdir(os.path.join(self.tmp_dir.name, "nested"))
+        for path in ("A1.fasta", "A2.fa", "notes.txt", os.path.join("nested", "B1.fasta")):
+            open(os.path.join(self.tmp_dir.name, path), "w").close()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def found(self, *args, **kwargs):
+        return sorted(os.path.relpath(i, self.tmp_dir.name) for i in find_files(self.tmp_dir.name, *args, **kwargs))
+
+    def test_find_files_with_regex(self):
+        """
+        Tests that find_files only returns files whose path matches the regex
+        """
+        self.assertEqual(self.found(r".*\.fa(sta)?$"), ["A1.fasta", "A2.fa"])
+
+    def test_find_files_with_compiled_regex(self):
+        """
+        Tests find_files with a precompiled regex
+        """
+        self.assertEqual(self.found(re.compile(r"\.txt$")), ["notes.txt"])
+
+    def test_find_files_without_regex(self):
+        """
+        Tests that find_files returns every file, but no directories, when no regex is given
+        """
+        self.assertEqual(self.found(), ["A1.fasta", "A2.fa", "notes.txt"])
+
+    def test_find_files_recursive(self):
+        """
+        Tests that find_files searches subdirectories when recursive is set
+        """
+        self.assertEqual(self.found(r"\.fasta$", recursive=True), ["A1.fasta", os.path.join("nested", "B1.fasta")])
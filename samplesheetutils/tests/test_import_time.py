@@ -0,0 +1,24 @@
+import unittest, subprocess, sys
+
+# Modules only some options need. Importing them up front slows down every invocation of the commands
+DEFERRED_MODULES = {"yaml", "json", "csv", "sqlite3", "concurrent.futures", "multiprocessing", "tempfile", "cProfile", "typing", "hashlib"}
+
+def imported_modules(module):
+    """
+    Return the set of modules imported by importing a module in a fresh interpreter, using python -X importtime
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True)
+    return {line.split("|")[-1].strip() for line in result.stderr.splitlines() if line.startswith("import time:")}
+
+class TestImportTime(unittest.TestCase):
+    def test_sample_name_imports(self):
+        """
+        Tests that the sample-name command does not import modules it does not need on start-up
+        """
+        self.assertEqual(imported_modules("samplesheetutils.binaries.sample_name") & DEFERRED_MODULES, set())
+
+    def test_create_samplesheet_imports(self):
+        """
+        Tests that create-samplesheet only imports the writers' dependencies when they are used
+        """
+        self.assertEqual(imported_modules("samplesheetutils.binaries.create_samplesheet") & DEFERRED_MODULES, set())
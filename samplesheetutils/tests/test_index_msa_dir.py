@@ -0,0 +1,34 @@
+import unittest, os, tempfile
+from samplesheetutils.utils.directory import *
+
+class TestIndexMSADir(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.mkdir(os.path.join(self.tmp_dir.name, "C1"))
+        os.mkdir(os.path.join(self.tmp_dir.name, "A1"))
+        for path in ("A1.a3m", "A1.m3a", "B1.m3a", "notes.txt", os.path.join("C1", "C1.a3m"), os.path.join("A1", "A1.a3m")):
+            open(os.path.join(self.tmp_dir.name, path), "w").close()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_index_msa_dir(self):
+        """
+        Tests that index_msa_dir maps sample names to .a3m and .m3a files, preferring .a3m
+        """
+        msa_index = index_msa_dir(self.tmp_dir.name)
+
+        self.assertEqual(msa_index, {
+            "A1": os.path.join(self.tmp_dir.name, "A1.a3m"),
+            "B1": os.path.join(self.tmp_dir.name, "B1.m3a"),
+        })
+
+    def test_index_msa_dir_recursive(self):
+        """
+        Tests that index_msa_dir finds MSAs in per-sample subdirectories, preferring top level files
+        """
+        msa_index = index_msa_dir(self.tmp_dir.name, recursive=True)
+
+        self.assertEqual(msa_index["A1"], os.path.join(self.tmp_dir.name, "A1.a3m"))
+        self.assertEqual(msa_index["C1"], os.path.join(self.tmp_dir.name, "C1", "C1.a3m"))
+        self.assertEqual(len(msa_index), 3)
@@ -0,0 +1,93 @@
+import unittest, os, types
+from samplesheetutils.utils.fasta import *
+
+class TestIterFASTA(unittest.TestCase):
+    def test_iter_fasta_is_generator(self):
+        """
+        Tests that iter_fasta yields samples lazily instead of returning a list
+        """
+        fp = open(".tmp.fasta", "w")
+        fp.write(">TEST\nMPGAFSQNSS\nKRRAVLPRSHR\n>DEMO\nAAAAAA\nAAAAAA")
+        fp.close()
+
+        with open(".tmp.fasta", "r") as fasta_fp:
+            fasta_iter = iter_fasta(fasta_fp)
+            self.assertIsInstance(fasta_iter, types.GeneratorType)
+
+            first_sample = next(fasta_iter)
+            self.assertEqual(first_sample.name, "TEST")
+            self.assertEqual(first_sample.data, "MPGAFSQNSSKRRAVLPRSHR")
+            self.assertEqual(first_sample.path, ".tmp.fasta")
+
+            remaining = list(fasta_iter)
+
+        self.assertEqual(len(remaining), 1)
+        self.assertEqual(remaining[0].name, "DEMO")
+        self.assertEqual(remaining[0].data, "AAAAAAAAAAAA")
+        os.remove(".tmp.fasta")
+
+    def test_iter_fasta_single_line(self):
+        """
+        Tests that iter_fasta stops after the first header when single_line is set
+        """
+        fp = open(".tmp.fasta", "w")
+        fp.write(">TEST\nMPGAFSQNSS\n>DEMO\nAAAAAA")
+        fp.close()
+
+        with open(".tmp.fasta", "r") as fasta_fp:
+            fasta_output = list(iter_fasta(fasta_fp, single_line=True))
+
+        self.assertEqual(len(fasta_output), 1)
+        self.assertEqual(fasta_output[0].name, "TEST")
+        os.remove(".tmp.fasta")
+
+    def test_iter_fasta_does_not_close(self):
+        """
+        Tests that iter_fasta leaves closing the file to the caller
+        """
+        fp = open(".tmp.fasta", "w")
+        fp.write(">TEST\nMPGAFSQNSS")
+        fp.close()
+
+        fasta_fp = open(".tmp.fasta", "r")
+        list(iter_fasta(fasta_fp))
+        self.assertFalse(fasta_fp.closed)
+        fasta_fp.close()
+        os.remove(".tmp.fasta")
+
+    def test_iter_fasta_lazy(self):
+        """
+        Tests that lazy samples decode the same sequences as iter_fasta, only when data is read
+        """
+        fp = open(".tmp.fasta", "w", newline="")
+        fp.write("comment\n>TEST\r\nMPGAF \r\nSQNSS\r\n>EMPTY\n>DEMO\nAAAAAA\nAAA")
+        fp.close()
+
+        with open(".tmp.fasta", "r") as fasta_fp:
+            expected = [(i.name, i.data) for i in iter_fasta(fasta_fp)]
+        with open(".tmp.fasta", "r") as fasta_fp:
+            samples = list(iter_fasta(fasta_fp, lazy=True))
+
+        self.assertTrue(all(isinstance(i, LazySample) for i in samples))
+        self.assertEqual([(i.name, i.data) for i in samples], expected)
+
+        samples[0].data = "REPLACED"
+        self.assertEqual(samples[0].data, "REPLACED")
+        os.remove(".tmp.fasta")
+
+    def test_iter_fasta_lazy_inner_whitespace(self):
+        """
+        Tests that lazy samples only strip the ends of each sequence line, keeping whitespace inside a line like iter_fasta
+        """
+        fp = open(".tmp.fasta", "w", newline="")
+        fp.write(">A\nAC DE\nFG*\n>B\r\n\tMPG\t\r\nAF \n")
+        fp.close()
+
+        with open(".tmp.fasta", "r") as fasta_fp:
+            expected = [(i.name, i.data) for i in iter_fasta(fasta_fp)]
+        with open(".tmp.fasta", "r") as fasta_fp:
+            samples = [(i.name, i.data) for i in iter_fasta(fasta_fp, lazy=True)]
+
+        self.assertEqual(expected, [("A", "AC DEFG*"), ("B", "MPGAF")])
+        self.assertEqual(samples, expected)
+        os.remove(".tmp.fasta")
@@ -0,0 +1,85 @@
+import unittest, io, os
+from samplesheetutils.utils.fasta import *
+
+class TestIterFASTAHeaders(unittest.TestCase):
+    def test_headers_only(self):
+        """
+        Tests that iter_fasta_headers returns every sample name without sequence data
+        """
+        fp = open(".tmp.fasta", "w")
+        fp.write("ignored preamble\n>TEST\nMPGAFSQNSS\nKRRAVLPRSHR\n>DEMO description\r\nAAAAAA\n>LAST")
+        fp.close()
+
+        with open(".tmp.fasta", "r") as fasta_fp:
+            fasta_output = list(iter_fasta_headers(fasta_fp))
+
+        self.assertEqual([i.name for i in fasta_output], ["TEST", "DEMO description", "LAST"])
+        self.assertEqual([i.data for i in fasta_output], ["", "", ""])
+        self.assertEqual(fasta_output[0].path, ".tmp.fasta")
+        os.remove(".tmp.fasta")
+
+    def test_headers_single_line(self):
+        """
+        Tests that iter_fasta_headers stops after the first header when single_line is set
+        """
+        fp = open(".tmp.fasta", "w")
+        fp.write(">TEST\nMPGAFSQNSS\n>DEMO\nAAAAAA")
+        fp.close()
+
+        with open(".tmp.fasta", "r") as fasta_fp:
+            fasta_output = list(iter_fasta_headers(fasta_fp, single_line=True))
+
+        self.assertEqual([i.name for i in fasta_output], ["TEST"])
+        os.remove(".tmp.fasta")
+
+    def test_cr_line_endings(self):
+        """
+        Tests that files whose lines end with a lone carriage return are split like universal newline text reading does
+        """
+        fp = open(".tmp.fasta", "w", newline="")
+        fp.write(">A\rMKT\r>B\rGG\r")
+        fp.close()
+
+        with open(".tmp.fasta", "r") as fasta_fp:
+            self.assertEqual([i.name for i in iter_fasta_headers(fasta_fp)], ["A", "B"])
+        with open(".tmp.fasta", "r") as fasta_fp:
+            self.assertEqual([(i.name, i.data) for i in iter_fasta(fasta_fp, lazy=True)], [("A", "MKT"), ("B", "GG")])
+        os.remove(".tmp.fasta")
+
+    def test_headers_empty_file(self):
+        """
+        Tests iter_fasta_headers with an empty file
+        """
+        open(".tmp.fasta", "w").close()
+
+        with open(".tmp.fasta", "r") as fasta_fp:
+            fasta_output = list(iter_fasta_headers(fasta_fp))
+
+        self.assertEqual(len(fasta_output), 0)
+        os.remove(".tmp.fasta")
+
+    def test_headers_unmappable_file(self):
+        """
+        Tests that iter_fasta_headers falls back to reading lines for file objects without a file descriptor
+        """
+        fasta_fp = io.StringIO(">TEST\nMPGAFSQNSS\n>DEMO\nAAAAAA")
+        fasta_fp.name = "stdin"
+
+        fasta_output = list(iter_fasta_headers(fasta_fp))
+
+        self.assertEqual([i.name for i in fasta_output], ["TEST", "DEMO"])
+
+    def test_read_fasta_without_data(self):
+        """
+        Tests that read_fasta honours read_data=False
+        """
+        fp = open(".tmp.fasta", "w")
+        fp.write(">TEST\nMPGAFSQNSS\n>DEMO\nAAAAAA")
+        fp.close()
+
+        with open(".tmp.fasta", "r") as fasta_fp:
+            fasta_output = read_fasta(fasta_fp, read_data=False, single_line=False)
+
+        self.assertEqual([i.name for i in fasta_output], ["TEST", "DEMO"])
+        self.assertEqual([i.data for i in fasta_output], ["", ""])
+        os.remove(".tmp.fasta")
@@ -1,4 +1,4 @@
-import unittest
+import unittest, os, tempfile
 from samplesheetutils.utils.fasta import *
 from samplesheetutils.utils.sample import *
 
@@ -15,3 +15,42 @@ class TestMakeFasta(unittest.TestCase):
         fp.close()
         self.assertEqual(fp_data, ">TEST\nAAAAAAA")
 
+
+    def test_make_fasta_fixed_width(self):
+        """
+        Tests make_fasta wrapping a sequence every n characters
+        """
+        sample_input = Sample("TEST", ".tmp.fasta", "AAAAAAA")
+        make_fasta(sample_input, fixed_width=True, fixed_width_column_count=3)
+
+        fp = open(".tmp.fasta", "r")
+        fp_data = fp.read()
+        fp.close()
+        self.assertEqual(fp_data, ">TEST\nAAA\nAAA\nA")
+        os.remove(".tmp.fasta")
+
+    def test_make_fasta_parallel_atomic(self):
+        """
+        Tests make_fasta writing many files with a thread pool, through temporary files
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            sample_input = [Sample(f"TEST{i}", os.path.join(tmp_dir, f"{i}.fasta"), "A" * i) for i in range(20)]
+            make_fasta(sample_input, jobs=4, atomic=True)
+
+            self.assertEqual(sorted(os.listdir(tmp_dir)), sorted(f"{i}.fasta" for i in range(20)))
+            with open(os.path.join(tmp_dir, "7.fasta"), "r") as fp:
+                self.assertEqual(fp.read(), ">TEST7\nAAAAAAA")
+
+    def test_write_multi_fasta(self):
+        """
+        Tests writing several samples to a single FASTA file
+        """
+        sample_input = [Sample("TEST", ".tmp1.fasta", "AAAAAAA"), Sample("DEMO", ".tmp2.fasta", "MPG")]
+        write_multi_fasta(iter(sample_input), ".tmp.fasta", fixed_width=True, fixed_width_column_count=5, atomic=True)
+
+        fp = open(".tmp.fasta", "r")
+        fp_data = fp.read()
+        fp.close()
+        self.assertEqual(fp_data, ">TEST\nAAAAA\nAA\n>DEMO\nMPG\n")
+        self.assertEqual([i.data for i in read_fasta(open(".tmp.fasta", "r"), read_data=True, single_line=False)], ["AAAAAAA", "MPG"])
+        os.remove(".tmp.fasta")
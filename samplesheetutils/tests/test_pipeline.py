@@ -0,0 +1,217 @@
+import unittest, io, os, tempfile
+from collections import Counter
+from samplesheetutils.utils.pipeline import *
+from samplesheetutils.utils.sample import Sample
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_string_source(self):
+        """
+        Tests that string_source yields the sample for an amino acid string and writes its FASTA file
+        """
+        samples = list(string_source("MPGAFSQNSS", self.tmp_dir.name))
+
+        self.assertEqual(len(samples), 1)
+        self.assertEqual(samples[0].name, "MPGAFS")
+        self.assertEqual(samples[0].path, self.tmp_dir.name + "/manual_entry-MPGAFS-af2.fasta")
+        with open(samples[0].path, "r") as fp:
+            self.assertEqual(fp.read(), ">MPGAFS\nMPGAFSQNSS")
+
+    def test_stdin_source(self):
+        """
+        Tests that stdin_source writes each record of a FASTA stream to its own file
+        """
+        fasta_fp = io.StringIO(">TEST 1\nMPGAF\nSQNSS\n>DEMO\nAAAAAA\n")
+        fasta_fp.name = "<stdin>"
+
+        samples = list(stdin_source(fasta_fp, self.tmp_dir.name))
+
+        self.assertEqual([i.name for i in samples], ["TEST 1", "DEMO"])
+        self.assertEqual(samples[0].path, self.tmp_dir.name + "/manual_entry-TEST_1-af2.fasta")
+        with open(samples[1].path, "r") as fp:
+            self.assertEqual(fp.read(), ">DEMO\nAAAAAA")
+
+    def test_parse_files(self):
+        """
+        Tests that parse_files flattens the samples of several files in order
+        """
+        paths = []
+        for i in range(3):
+            paths.append(os.path.join(self.tmp_dir.name, f"{i}.fasta"))
+            with open(paths[-1], "w") as fp:
+                fp.write(f">SAMPLE{i}\nMPGAF\n>CHAIN{i}\nAAAAAA")
+
+        samples = list(parse_files(paths, jobs=2))
+
+        self.assertEqual([i.name for i in samples], ["SAMPLE0", "CHAIN0", "SAMPLE1", "CHAIN1", "SAMPLE2", "CHAIN2"])
+
+    def test_attach_msas(self):
+        """
+        Tests that attach_msas sets MSAs from the index and counts matches
+        """
+        counts = Counter()
+        samples = [Sample("TEST1", ".tmp1.fasta", "AAAAAA"), Sample("TEST2", ".tmp2.fasta", "AAAAAA")]
+
+        samples = list(attach_msas(samples, {"TEST1": "TEST1.a3m"}, counts))
+
+        self.assertEqual([i.msa for i in samples], ["TEST1.a3m", None])
+        self.assertEqual(counts, Counter(found=1, missing=1))
+
+    def test_write_samplesheet(self):
+        """
+        Tests that write_samplesheet dispatches to the writer of each format
+        """
+        samples = [Sample("TEST", ".tmp.fasta", "AAAAAA")]
+        expected = {
+            "csv": "sequence,fasta\nTEST,.tmp.fasta\n",
+            "json": '{"entities": [{"type": "protein", "sequence": "AAAAAA", "count": "1"}]}',
+            "jsonl": '{"type": "protein", "sequence": "AAAAAA", "count": "1"}\n',
+            "yaml": "sequences:\n- protein:\n    id: TEST\n    sequence: AAAAAA\nversion: 1\n",
+        }
+
+        for output_format in OUTPUT_EXTENSIONS:
+            fp = io.StringIO()
+            write_samplesheet(iter(samples), output_format, fp)
+            self.assertEqual(fp.getvalue(), expected[output_format])
+
+        with self.assertRaises(ValueError):
+            write_samplesheet(samples, "xml", io.StringIO())
+
+    def test_replacing_file(self):
+        """
+        Tests that a samplesheet failing half way through leaves no partial file, and does not replace an existing one
+        """
+        path = os.path.join(self.tmp_dir.name, "samplesheet.json")
+        with open(path, "w") as fp:
+            fp.write("previous")
+
+        def samples():
+            yield Sample("TEST", ".tmp.fasta", "AAAAAA")
+            raise ValueError("Sample failed validation")
+
+        with self.assertRaises(ValueError):
+            with replacing_file(path) as fp:
+                write_samplesheet(samples(), "json", fp)
+
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["samplesheet.json"])
+        with open(path, "r") as fp:
+            self.assertEqual(fp.read(), "previous")
+
+        with replacing_file(path) as fp:
+            write_samplesheet(iter([Sample("TEST", ".tmp.fasta", "AAAAAA")]), "jsonl", fp)
+        with open(path, "r") as fp:
+            self.assertEqual(fp.read(), '{"type": "protein", "sequence": "AAAAAA", "count": "1"}\n')
+
+    def test_aa_file_source(self):
+        """
+        Tests that aa_file_source writes a FASTA file for every sequence, named or not
+        """
+        aa_fp = io.StringIO("MPGAFSQNSS\n\nTEST 1\tAAAAAA\n")
+
+        samples = list(aa_file_source(aa_fp, self.tmp_dir.name))
+
+        self.assertEqual([(i.name, i.data) for i in samples], [("MPGAFS", "MPGAFSQNSS"), ("TEST 1", "AAAAAA")])
+        self.assertEqual(samples[1].path, self.tmp_dir.name + "/manual_entry-TEST_1-af2.fasta")
+        with open(samples[0].path, "r") as fp:
+            self.assertEqual(fp.read(), ">MPGAFS\nMPGAFSQNSS")
+
+    def test_clashing_names(self):
+        """
+        Tests that sequences sharing their first residues, or names that only clash once sanitised, get their own FASTA files
+        """
+        aa_fp = io.StringIO("MPGAFSQQQ\nMPGAFSKKK\nMPGAFSRRR\nMPGAFS_1\tAAAAAA\n")
+
+        samples = list(aa_file_source(aa_fp, self.tmp_dir.name, jobs=2))
+
+        self.assertEqual([i.name for i in samples], ["MPGAFS", "MPGAFS_1", "MPGAFS_2", "MPGAFS_1_1"])
+        self.assertEqual(len(set(i.path for i in samples)), 4)
+        for sample in samples:
+            with open(sample.path, "r") as fp:
+                self.assertEqual(fp.read(), f">{sample.name}\n{sample.data}")
+
+        fasta_fp = io.StringIO(">TEST 1\nMPGAF\n>TEST.1\nAAAAAA\n")
+        fasta_fp.name = "<stdin>"
+
+        samples = list(stdin_source(fasta_fp, self.tmp_dir.name))
+
+        self.assertEqual([i.name for i in samples], ["TEST 1", "TEST.1_1"])
+        self.assertEqual(samples[1].path, self.tmp_dir.name + "/manual_entry-TEST_1_1-af2.fasta")
+
+    def test_dedupe_samples(self):
+        """
+        Tests that dedupe_samples keeps the first sample of each sequence and maps every sample to it
+        """
+        samples = [Sample("A", "a.fasta", "MPGAF"), Sample("B", "b.fasta", "AAAAAA"), Sample("C", "c.fasta", "MPGAF")]
+        mapping_fp = io.StringIO()
+        counts = Counter()
+
+        kept = list(dedupe_samples(iter(samples), mapping_fp, counts))
+
+        self.assertEqual([i.name for i in kept], ["A", "B"])
+        self.assertEqual(counts, Counter(unique=2, duplicate=1))
+        rows = [i.split("\t") for i in mapping_fp.getvalue().splitlines()]
+        self.assertEqual(rows[0], ["name", "path", "canonical_name", "canonical_path", "sequence_hash"])
+        self.assertEqual(rows[3][:4], ["C", "c.fasta", "A", "a.fasta"])
+        self.assertEqual(rows[3][4], rows[1][4])
+
+    def test_group_by_file(self):
+        """
+        Tests that group_by_file joins the chains of each file, so files are compared as complexes
+        """
+        samples = [Sample("A", "a.fasta", "MPG"), Sample("B", "a.fasta", "KKK"), Sample("C", "c.fasta", "MPG")]
+
+        files = list(group_by_file(samples))
+
+        self.assertEqual([(i.name, i.path, i.data) for i in files], [("A", "a.fasta", "MPG:KKK"), ("C", "c.fasta", "MPG")])
+
+    def test_per_file_path(self):
+        """
+        Tests that per-file outputs mirror the input directory, without FASTA or compression extensions
+        """
+        self.assertEqual(per_file_path("in/sub/A1.fasta.gz", "in", "out"), os.path.join("out", "sub", "A1.yaml"))
+        self.assertEqual(per_file_path("in/A1.fa", "in", "out"), os.path.join("out", "A1.yaml"))
+
+    def test_write_yaml_per_file(self):
+        """
+        Tests that write_yaml_per_file writes one document per FASTA file, listed in input order in the manifest
+        """
+        samples = [Sample(f"S{i}", os.path.join(self.tmp_dir.name, "in", f"{i // 2}.fasta"), "AAAAAA") for i in range(20)]
+        samples[0].msa = "S0.a3m"
+        output_dir = os.path.join(self.tmp_dir.name, "out")
+        manifest_fp = io.StringIO()
+
+        count = write_yaml_per_file(iter(samples), os.path.join(self.tmp_dir.name, "in"), output_dir, manifest_fp, jobs=3, atomic=True)
+
+        self.assertEqual(count, 10)
+        rows = [i.split("\t") for i in manifest_fp.getvalue().splitlines()]
+        self.assertEqual(rows[0], ["yaml", "fasta", "chains", "residues", "msas"])
+        self.assertEqual([i[0] for i in rows[1:]], [os.path.join(output_dir, f"{i}.yaml") for i in range(10)])
+        self.assertEqual(rows[1][2:], ["2", "12", "1"])
+        with open(os.path.join(output_dir, "9.yaml"), "r") as fp:
+            self.assertEqual(fp.read(), "sequences:\n- protein:\n    id: A\n    sequence: AAAAAA\n- protein:\n    id: B\n    sequence: AAAAAA\nversion: 1\n")
+        self.assertEqual(sorted(os.listdir(output_dir)), sorted(f"{i}.yaml" for i in range(10)))
+
+    def test_write_yaml_per_file_clashing_paths(self):
+        """
+        Tests that FASTA files mapping to the same document path are each written to their own document
+        """
+        input_dir = os.path.join(self.tmp_dir.name, "in")
+        output_dir = os.path.join(self.tmp_dir.name, "out")
+        paths = [os.path.join(input_dir, i) for i in ("x.fa", "x.fasta", "x.1.fa", "x.fasta.gz")]
+        samples = [Sample(f"S{i}", path, "AAAAAA") for i, path in enumerate(paths)]
+
+        for jobs in (1, 3):
+            manifest_fp = io.StringIO()
+            count = write_yaml_per_file(iter(samples), input_dir, output_dir, manifest_fp, jobs=jobs)
+
+            self.assertEqual(count, 4)
+            yaml_paths = [i.split("\t")[0] for i in manifest_fp.getvalue().splitlines()[1:]]
+            self.assertEqual(yaml_paths, [os.path.join(output_dir, i) for i in ("x.yaml", "x.1.yaml", "x.1.1.yaml", "x.2.yaml")])
+            self.assertEqual(sorted(os.listdir(output_dir)), ["x.1.1.yaml", "x.1.yaml", "x.2.yaml", "x.yaml"])
+            with open(os.path.join(output_dir, "x.2.yaml"), "r") as fp:
+                self.assertIn("id: A", fp.read())
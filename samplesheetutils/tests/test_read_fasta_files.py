@@ -0,0 +1,42 @@
+import unittest, os, tempfile
+from samplesheetutils.utils.fasta import *
+
+class TestReadFASTAFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i in range(20):
+            path = os.path.join(self.tmp_dir.name, f"{i}.fasta")
+            with open(path, "w") as fp:
+                fp.write(f">SAMPLE{i}\nMPGAF\n>CHAIN{i}\nAAAAAA")
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_thread_pool_preserves_order(self):
+        """
+        Tests that read_fasta_files yields files in input order when reading in parallel
+        """
+        fasta_output = list(read_fasta_files(self.paths, read_data=True, single_line=False, jobs=4))
+
+        self.assertEqual([i[0].name for i in fasta_output], [f"SAMPLE{i}" for i in range(20)])
+        self.assertEqual([i[1].data for i in fasta_output], ["AAAAAA"] * 20)
+        self.assertEqual([i[0].path for i in fasta_output], self.paths)
+
+    def test_process_pool_preserves_order(self):
+        """
+        Tests that read_fasta_files yields files in input order when using worker processes
+        """
+        fasta_output = list(read_fasta_files(self.paths, single_line=True, jobs=2, processes=True))
+
+        self.assertEqual([[j.name for j in i] for i in fasta_output], [[f"SAMPLE{i}"] for i in range(20)])
+
+    def test_single_job(self):
+        """
+        Tests read_fasta_files without a worker pool
+        """
+        fasta_output = list(read_fasta_files(iter(self.paths), single_line=False, jobs=1))
+
+        self.assertEqual(len(fasta_output), 20)
+        self.assertEqual([i.name for i in fasta_output[3]], ["SAMPLE3", "CHAIN3"])
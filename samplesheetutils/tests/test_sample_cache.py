@@ -0,0 +1,102 @@
+import unittest, os, tempfile
+from samplesheetutils.utils.cache import *
+
+class TestSampleCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp_dir.name, "cache.sqlite")
+        self.paths = []
+        for i in range(6):
+            self.paths.append(os.path.join(self.tmp_dir.name, f"{i}.fasta"))
+            self.write(i, f">SAMPLE{i}\nMPGAF\n>CHAIN{i}\nAAAAAA\n")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, i, content):
+        with open(self.paths[i], "w") as fp:
+            fp.write(content)
+
+    def names(self, fasta_files):
+        return [[j.name for j in i] for i in fasta_files]
+
+    def test_get_and_put(self):
+        """
+        Tests storing and retrieving the samples of a file
+        """
+        cache = SampleCache(self.cache_path)
+        file_stat = os.stat(self.paths[0])
+
+        self.assertIsNone(cache.get(self.paths[0], file_stat))
+        cache.put(self.paths[0], file_stat, [Sample("SAMPLE0", self.paths[0], "MPGAF"), Sample("CHAIN0", self.paths[0], "AAAAAA")])
+
+        samples = cache.get(self.paths[0], file_stat)
+        self.assertEqual([(i.name, i.path, i.data) for i in samples], [("SAMPLE0", self.paths[0], "MPGAF"), ("CHAIN0", self.paths[0], "AAAAAA")])
+        self.assertEqual([i.name for i in cache.get(self.paths[0], file_stat, single_line=True)], ["SAMPLE0"])
+        cache.close()
+
+    def test_get_needs_enough_detail(self):
+        """
+        Tests that files cached without sequences or with only their first sample are not used for more
+        """
+        cache = SampleCache(self.cache_path)
+        file_stat = os.stat(self.paths[0])
+        cache.put(self.paths[0], file_stat, [Sample("SAMPLE0", self.paths[0], "")], read_data=False, single_line=True)
+
+        self.assertIsNone(cache.get(self.paths[0], file_stat, read_data=True, single_line=True))
+        self.assertIsNone(cache.get(self.paths[0], file_stat, read_data=False, single_line=False))
+        self.assertEqual(len(cache.get(self.paths[0], file_stat, read_data=False, single_line=True)), 1)
+        cache.close()
+
+    def test_cached_fasta_files(self):
+        """
+        Tests that only new or modified files are parsed again, and that file order is kept
+        """
+        cache = SampleCache(self.cache_path)
+        first_run = self.names(cached_fasta_files(self.paths[:5], cache, read_data=True, single_line=False, jobs=2))
+        cache.close()
+
+        self.write(2, ">CHANGED\nMPGAF\n")
+        os.utime(self.paths[2], ns=(0, 0))
+
+        cache = SampleCache(self.cache_path)
+        second_run = self.names(cached_fasta_files(self.paths, cache, read_data=True, single_line=False, jobs=2))
+
+        self.assertEqual(first_run, [[f"SAMPLE{i}", f"CHAIN{i}"] for i in range(5)])
+        self.assertEqual(second_run, [[f"SAMPLE{i}", f"CHAIN{i}"] if i != 2 else ["CHANGED"] for i in range(6)])
+        self.assertEqual((cache.hits, cache.misses), (4, 2))
+        cache.close()
+
+    def test_cached_fasta_files_streams(self):
+        """
+        Tests that cached files are yielded as they are looked up, rather than once every path has been read
+        """
+        cache = SampleCache(self.cache_path)
+        list(cached_fasta_files(self.paths, cache, read_data=True, single_line=False, jobs=2))
+
+        pulled = []
+        def paths():
+            for path in self.paths:
+                pulled.append(path)
+                yield path
+
+        for jobs in (1, 2):
+            pulled.clear()
+            fasta_files = cached_fasta_files(paths(), cache, read_data=True, single_line=False, jobs=jobs)
+            self.assertEqual(self.names([next(fasta_files)]), [["SAMPLE0", "CHAIN0"]])
+            self.assertEqual(len(pulled), 1)
+            self.assertEqual(len(list(fasta_files)), 5)
+        cache.close()
+
+    def test_evict_unseen(self):
+        """
+        Tests that files not looked up during a run are removed from the cache
+        """
+        cache = SampleCache(self.cache_path)
+        list(cached_fasta_files(self.paths, cache, jobs=1))
+        cache.close()
+
+        cache = SampleCache(self.cache_path)
+        list(cached_fasta_files(self.paths[:4], cache, jobs=1))
+        self.assertEqual(cache.evict_unseen(), 2)
+        cache.close()
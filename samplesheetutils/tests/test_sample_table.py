@@ -0,0 +1,52 @@
+import unittest, io
+from samplesheetutils.utils.sample import *
+from samplesheetutils.utils.output import *
+
+class TestSampleTable(unittest.TestCase):
+    def test_sample_slots(self):
+        """
+        Tests that Sample objects have no per-instance dictionary
+        """
+        sample = Sample("TEST", ".tmp.fasta", "AAAAAA")
+
+        self.assertFalse(hasattr(sample, "__dict__"))
+        with self.assertRaises(AttributeError):
+            sample.other = "value"
+
+    def test_sample_table_round_trip(self):
+        """
+        Tests that samples read back from a SampleTable match the samples put in
+        """
+        table = SampleTable([Sample("TEST1", ".tmp.fasta", "MPGAFSQNSS", "TEST1.a3m"), Sample("TEST2", ".tmp.fasta", "")])
+        table.append(Sample("TEST3", ".tmp3.fasta", "AAAAAA"))
+
+        self.assertEqual(len(table), 3)
+        self.assertEqual([(i.name, i.path, i.data, i.msa) for i in table], [
+            ("TEST1", ".tmp.fasta", "MPGAFSQNSS", "TEST1.a3m"),
+            ("TEST2", ".tmp.fasta", "", None),
+            ("TEST3", ".tmp3.fasta", "AAAAAA", None),
+        ])
+        self.assertEqual(table[-1].name, "TEST3")
+        self.assertEqual(table.sequence(0), "MPGAFSQNSS")
+        self.assertEqual(table.sequence_length(2), 6)
+        with self.assertRaises(IndexError):
+            table[3]
+
+    def test_sample_table_shares_paths(self):
+        """
+        Tests that repeated paths are stored once
+        """
+        table = SampleTable(Sample(f"TEST{i}", "".join([".tmp", ".fasta"]), "AAAAAA") for i in range(2))
+
+        self.assertIs(table.paths[0], table.paths[1])
+
+    def test_sample_table_writer(self):
+        """
+        Tests that a SampleTable can be passed straight to a writer
+        """
+        table = SampleTable([Sample("TEST1", ".tmp1.fasta", "AAAAAA"), Sample("TEST2", ".tmp2.fasta", "AAAAAA")])
+        fp = io.StringIO()
+
+        create_csv(table, "sample", "sequence", fp)
+
+        self.assertEqual(fp.getvalue(), "sample,sequence\nTEST1,.tmp1.fasta\nTEST2,.tmp2.fasta\n")
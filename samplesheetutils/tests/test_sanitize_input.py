@@ -25,3 +25,32 @@ class TestSanitizeInput(unittest.TestCase):
 
         self.assertFalse(invalid_chars)
 
+
+    def test_replacement(self):
+        """
+        Tests that sanitize_input uses the given replacement and disallowed characters
+        """
+        self.assertEqual(sanitize_input("a b,c", replcement='-'), "a-b-c")
+        self.assertEqual(sanitize_input("a b,c", disallowed_chars=[','], replcement=''), "a bc")
+
+    def test_sanitize_many(self):
+        """
+        Tests sanitising several strings at once
+        """
+        self.assertEqual(sanitize_many(["A B", "C.D", "E"]), ["A_B", "C_D", "E"])
+
+    def test_sanitize_collisions(self):
+        """
+        Tests that distinct strings sanitising to the same string are reported
+        """
+        collisions = sanitize_collisions(["A B", "A.B", "A B", "C D", "A_B2"])
+
+        self.assertEqual(collisions, {"A_B": ["A B", "A.B"]})
+
+    def test_sanitize_many_with_newlines(self):
+        """
+        Tests sanitize_many with strings containing the separator used to batch them
+        """
+        self.assertEqual(sanitize_many(["A\nB", "C D"]), ["A\nB", "C_D"])
+        self.assertEqual(sanitize_many([]), [])
+        self.assertEqual(sanitize_many([""]), [""])
@@ -0,0 +1,49 @@
+import unittest
+from samplesheetutils.utils.shard import *
+from samplesheetutils.utils.sample import Sample
+
+class TestShard(unittest.TestCase):
+    def test_balanced_shards(self):
+        """
+        Tests that balanced_shards spreads the heaviest items first, keeping the original order within shards
+        """
+        shards = balanced_shards([1, 7, 3, 5, 4, 2], 2)
+
+        self.assertEqual(shards, [[0, 1, 2], [3, 4, 5]])
+        self.assertEqual(balanced_shards([1], 3), [[0], [], []])
+        with self.assertRaises(ValueError):
+            balanced_shards([1], 0)
+
+    def test_budget_shards(self):
+        """
+        Tests that budget_shards keeps shards under the budget, giving oversized items a shard of their own
+        """
+        weights = [4, 9, 3, 3, 20, 5]
+        shards = budget_shards(weights, 10)
+
+        self.assertEqual(sorted(sum(weights[i] for i in shard) for shard in shards), [6, 9, 9, 20])
+        self.assertEqual(sorted(i for shard in shards for i in shard), list(range(len(weights))))
+
+    def test_shard_samples(self):
+        """
+        Tests that shard_samples weighs samples by residue count, and optionally orders shards longest first
+        """
+        samples = [Sample("A", "a.fasta", "MP"), Sample("B", "b.fasta", "MPGAF:SQN"), Sample("C", "c.fasta", "MPGAFSQ"), Sample("D", "d.fasta", "M")]
+
+        shards = shard_samples(iter(samples), shards=2)
+        self.assertEqual([[i.name for i in shard] for shard in shards], [["B", "D"], ["A", "C"]])
+
+        shards = shard_samples(samples, max_residues=10, sort_by_length=True)
+        self.assertEqual([[i.name for i in shard] for shard in shards], [["B", "D"], ["C", "A"]])
+
+        self.assertEqual(shard_samples([], max_residues=10), [[]])
+
+    def test_shard_path(self):
+        """
+        Tests that shard numbers are zero padded and placed before the extension
+        """
+        self.assertEqual(shard_path("out/samplesheet.csv", 3, 12), "out/samplesheet.03.csv")
+        self.assertEqual(shard_path("samplesheet", 0, 2), "samplesheet.0")
+
+if __name__ == '__main__':
+    unittest.main()
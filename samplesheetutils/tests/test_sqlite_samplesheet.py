@@ -0,0 +1,54 @@
+import unittest, os, sqlite3, tempfile
+from samplesheetutils.utils.database import *
+from samplesheetutils.utils.sample import Sample
+
+class TestSQLiteSamplesheet(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "samplesheet.sqlite")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_create_sqlite(self):
+        """
+        Tests that create_sqlite writes every sample in order, in batches, with indexes on name and length
+        """
+        samples = [Sample(f"S{i}", f"{i}.fasta", "A" * (i + 1), f"S{i}.a3m" if i % 2 else None) for i in range(5)]
+
+        count = create_sqlite(iter(samples), self.path, batch_size=2)
+
+        self.assertEqual(count, 5)
+        connection = sqlite3.connect(self.path)
+        rows = connection.execute("SELECT name, path, length, msa, sequence FROM samples ORDER BY id").fetchall()
+        self.assertEqual(rows, [(i.name, i.path, len(i.data), i.msa, i.data) for i in samples])
+        indexes = {i[0] for i in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertEqual(indexes, {"samples_name", "samples_length"})
+        connection.close()
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["samplesheet.sqlite"])
+
+    def test_create_sqlite_replaces_existing(self):
+        """
+        Tests that writing a samplesheet again replaces the previous one
+        """
+        create_sqlite([Sample("OLD", "old.fasta", "MPG")], self.path)
+        create_sqlite([Sample("NEW", "new.fasta", "MPG")], self.path)
+
+        self.assertEqual([i.name for i in sqlite_source(self.path)], ["NEW"])
+
+    def test_sqlite_source(self):
+        """
+        Tests that sqlite_source reads the samples back in order, optionally within a length range
+        """
+        samples = [Sample(f"S{i}", f"{i}.fasta", "A" * (i + 1), "S0.a3m" if i == 0 else None) for i in range(5)]
+        create_sqlite(samples, self.path)
+
+        exported = list(sqlite_source(self.path))
+        self.assertEqual([(i.name, i.path, i.data, i.msa) for i in exported], [(i.name, i.path, i.data, i.msa) for i in samples])
+        self.assertEqual([i.name for i in sqlite_source(self.path, min_length=2, max_length=3)], ["S1", "S2"])
+
+        with self.assertRaises(ValueError):
+            list(sqlite_source(os.path.join(self.tmp_dir.name, "missing.sqlite")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest, io, json, time
+from samplesheetutils.utils.stats import *
+
+class TestStats(unittest.TestCase):
+    def test_wrap_counts_items(self):
+        """
+        Tests that Stats.wrap counts items and bytes, in pipeline order
+        """
+        stats = Stats()
+        files = stats.wrap("discovery", ["a", "bb", "ccc"], unit="files", size=len)
+        records = stats.wrap("parse", (i.upper() for i in files))
+
+        self.assertEqual(list(records), ["A", "BB", "CCC"])
+        self.assertEqual(list(stats.stages), ["discovery", "parse"])
+        self.assertEqual((stats.stages["discovery"]["files"], stats.stages["discovery"]["bytes"]), (3, 6))
+        self.assertEqual(stats.stages["parse"]["records"], 3)
+
+    def test_wrap_counts_files(self):
+        """
+        Tests that Stats.wrap counts the files records were read from, with the size of each file, and that Stats.count counts items
+        """
+        stats = Stats()
+        records = stats.wrap("parse", ["a1", "a2", "b1", "c1", "c2"], size={"a": 10, "b": 20, "c": 30}.get, file=lambda i: i[0])
+
+        with stats.stage("write"):
+            self.assertEqual(len(list(stats.count("write", records))), 5)
+
+        self.assertEqual((stats.stages["parse"]["files"], stats.stages["parse"]["records"], stats.stages["parse"]["bytes"]), (3, 5, 60))
+        self.assertEqual(stats.stages["write"]["records"], 5)
+
+    def test_nested_stage_time(self):
+        """
+        Tests that the time of a wrapped stage is not counted again in the stage consuming it
+        """
+        stats = Stats()
+
+        def slow():
+            for i in range(3):
+                time.sleep(0.02)
+                yield i
+
+        with stats.stage("write"):
+            list(stats.wrap("parse", slow()))
+
+        self.assertGreaterEqual(stats.stages["parse"]["seconds"], 0.05)
+        self.assertLess(stats.stages["write"]["seconds"], 0.02)
+
+    def test_write_json(self):
+        """
+        Tests the machine-readable output of Stats
+        """
+        stats = Stats()
+        stats.add("read", files=2, records=5, bytes_read=100)
+        fp = io.StringIO()
+
+        stats.write_json(fp)
+
+        output = json.loads(fp.getvalue())
+        self.assertEqual(output["stages"]["read"]["records"], 5)
+        self.assertIn("peak_rss_kb", output)
+
+    def test_null_stats(self):
+        """
+        Tests that disabled stats pass iterables through untouched
+        """
+        items = iter([1, 2, 3])
+
+        self.assertIs(NULL_STATS.wrap("parse", items), items)
+        self.assertIs(NULL_STATS.count("write", items), items)
+        with NULL_STATS.stage("write"):
+            NULL_STATS.add("read", files=1)
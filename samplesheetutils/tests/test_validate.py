@@ -0,0 +1,50 @@
+import unittest
+from samplesheetutils.utils.validate import *
+from samplesheetutils.utils.sample import Sample
+
+class TestValidate(unittest.TestCase):
+    def test_check_residues(self):
+        """
+        Tests that check_residues reports characters that are not amino acid codes, and counts non-standard residues
+        """
+        self.assertEqual(check_residues("MPGAFSQNSS"), ("", 0))
+        self.assertEqual(check_residues("MPGXa-K:BX"), ("-a", 3))
+        self.assertEqual(check_residues("MPG*é"), ("*é", 0))
+
+    def test_looks_like_nucleotides(self):
+        """
+        Tests that only long sequences of nucleotide letters are reported as nucleotide sequences
+        """
+        self.assertTrue(looks_like_nucleotides("ACGTACGTACGTACGTACGTAC"))
+        self.assertFalse(looks_like_nucleotides("ACGT"))
+        self.assertFalse(looks_like_nucleotides("ACGTACGTACGTACGTACGTAM"))
+
+    def test_validate_samples_warn(self):
+        """
+        Tests that invalid samples are kept and counted unless strict is set
+        """
+        samples = [Sample("A", "a.fasta", "MPGAF"), Sample("B", "b.fasta", "MPG-AF"), Sample("C", "c.fasta", "ACGT" * 6)]
+        summary = SequenceSummary(composition=True)
+
+        with self.assertLogs("samplesheetutils.utils.validate", level="WARNING") as logs:
+            kept = list(validate_samples(iter(samples), summary=summary))
+
+        self.assertEqual(kept, samples)
+        self.assertEqual(len(logs.output), 2)
+        result = summary.to_dict()
+        self.assertEqual((result["samples"], result["residues"], result["shortest"], result["longest"]), (3, 35, 5, 24))
+        self.assertEqual((result["invalid"], result["nucleotide"]), (1, 1))
+        self.assertEqual(result["composition"]["A"], 8)
+        self.assertEqual(result["composition"]["T"], 6)
+
+    def test_validate_samples_strict(self):
+        """
+        Tests that strict validation stops at the first invalid sample
+        """
+        samples = [Sample("A", "a.fasta", "MPGAF"), Sample("B", "b.fasta", "mpgaf")]
+
+        with self.assertRaises(ValueError):
+            list(validate_samples(samples, strict=True))
+
+if __name__ == '__main__':
+    unittest.main()
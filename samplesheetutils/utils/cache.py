@@ -0,0 +1,128 @@
+from samplesheetutils.utils.sample import Sample
+from samplesheetutils.utils.fasta import _read_fasta_path, default_jobs
+from collections import deque
+import json, os, sqlite3
+
+# Number of changed files written to the cache between commits
+CACHE_COMMIT_INTERVAL = 1000
+
+class SampleCache:
+    """
+    On-disk (SQLite) cache of parsed FASTA files, so unchanged files are not parsed again on the next run
+    A file's cached samples are used while its size, modification time and inode are unchanged.
+    Files that were not looked up during a run can be removed from the cache with evict_unseen
+    path: Path of the cache database. It is created if it does not exist
+    """
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                single_line INTEGER NOT NULL,
+                has_data INTEGER NOT NULL,
+                samples TEXT NOT NULL
+            )""")
+        self.seen = set()
+        self.hits = 0
+        self.misses = 0
+        self._uncommitted = 0
+
+    def get(self, path, file_stat, read_data=True, single_line=False):
+        """
+        Return the cached samples of a file, or None if the file changed or was not cached with enough detail
+        file_stat: os.stat result of the file
+        """
+        self.seen.add(path)
+        row = self.connection.execute(
+            "SELECT size, mtime_ns, inode, single_line, has_data, samples FROM files WHERE path = ?", (path,)).fetchone()
+
+        if (row is None
+                or row[:3] != (file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino)
+                or (row[3] and not single_line)
+                or (read_data and not row[4])):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        samples = [Sample(name, path, data if read_data else "") for name, data in json.loads(row[5])]
+        return samples[:1] if single_line else samples
+
+    def put(self, path, file_stat, samples, read_data=True, single_line=False):
+        """
+        Store the samples of a file, parsed with the given read_data and single_line settings
+        """
+        self.seen.add(path)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (path, file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino, int(single_line), int(read_data),
+             json.dumps([[i.name, i.data] for i in samples])))
+
+        self._uncommitted += 1
+        if self._uncommitted >= CACHE_COMMIT_INTERVAL:
+            self.connection.commit()
+            self._uncommitted = 0
+
+    def evict_unseen(self):
+        """
+        Remove every file that was not looked up or stored since the cache was opened. Returns the number of files removed
+        """
+        self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS seen (path TEXT PRIMARY KEY)")
+        self.connection.execute("DELETE FROM seen")
+        self.connection.executemany("INSERT OR IGNORE INTO seen VALUES (?)", ((i,) for i in self.seen))
+        evicted = self.connection.execute("DELETE FROM files WHERE path NOT IN (SELECT path FROM seen)").rowcount
+        self.connection.commit()
+        return evicted
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+def cached_fasta_files(paths, cache, read_data=False, single_line=True, jobs=None, processes=False, lazy=False):
+    """
+    Same as read_fasta_files, but files unchanged since they were cached are not parsed again
+    Files missing from the cache are still parsed in parallel, and cached files are yielded as soon as every file before them is,
+    so like read_fasta_files only a few files per worker are held at once, however many are cached
+    cache: SampleCache object
+    """
+    if jobs is None:
+        jobs = default_jobs()
+    lazy = lazy and not processes
+
+    if jobs <= 1:
+        for path in paths:
+            file_stat = os.stat(path)
+            fasta_data = cache.get(path, file_stat, read_data=read_data, single_line=single_line)
+            if fasta_data is None:
+                fasta_data = _read_fasta_path(path, read_data, single_line, lazy)
+                cache.put(path, file_stat, fasta_data, read_data=read_data, single_line=single_line)
+            yield fasta_data
+        return
+
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    max_pending = jobs * 4
+    # Every file not yet yielded, in order, as (path, stat, cached samples, or None and the future parsing the file)
+    pending = deque()
+
+    def result(path, file_stat, cached, future):
+        if cached is not None:
+            return cached
+        # The cache is only used from this thread, as SQLite connections cannot be shared between threads
+        fasta_data = future.result()
+        cache.put(path, file_stat, fasta_data, read_data=read_data, single_line=single_line)
+        return fasta_data
+
+    with executor_class(max_workers=jobs) as executor:
+        for path in paths:
+            file_stat = os.stat(path)
+            cached = cache.get(path, file_stat, read_data=read_data, single_line=single_line)
+            future = executor.submit(_read_fasta_path, path, read_data, single_line, lazy) if cached is None else None
+            pending.append((path, file_stat, cached, future))
+            # Cached files at the front are yielded straight away, and parsed files once the look-ahead is full
+            while pending and (pending[0][2] is not None or len(pending) >= max_pending):
+                yield result(*pending.popleft())
+        while pending:
+            yield result(*pending.popleft())
@@ -0,0 +1,180 @@
+from bisect import bisect_right
+import io, zlib
+
+# Leading bytes of each supported compression format
+COMPRESSION_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+)
+
+# Length of a BGZF block header, up to and including the block size field
+BGZF_HEADER_SIZE = 18
+
+def _is_bgzf_header(header):
+    # A gzip header with the FEXTRA flag, whose first extra subfield is bgzip's "BC" block size
+    return len(header) >= BGZF_HEADER_SIZE and header[:4] == b"\x1f\x8b\x08\x04" and header[12:14] == b"BC"
+
+def _compression_of(header):
+    for magic, compression in COMPRESSION_MAGIC:
+        if header.startswith(magic):
+            if compression == "gzip" and _is_bgzf_header(header):
+                return "bgzf"
+            return compression
+    return None
+
+def detect_compression(path):
+    """
+    Return the compression of a file from its leading bytes, whatever its extension: bgzf, gzip, bz2, xz, or None if uncompressed
+    BGZF files (written by bgzip) are also valid gzip files, but can be seeked into (see BgzfReader)
+    """
+    with open(path, "rb") as fp:
+        return _compression_of(fp.read(BGZF_HEADER_SIZE))
+
+class _DecompressedFile(io.BufferedReader):
+    """
+    Binary file over a decompressing file object, which also closes the compressed file under it. Its name is the path
+    of the compressed file, and it has no file descriptor, so readers never memory map the compressed bytes
+    """
+    def __init__(self, decompressed, fp):
+        super().__init__(decompressed)
+        self._compressed_fp = fp
+
+    @property
+    def name(self):
+        return self._compressed_fp.name
+
+    def fileno(self):
+        raise io.UnsupportedOperation("compressed files have no file descriptor to read directly")
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._compressed_fp.close()
+
+class _CompressedTextFile(io.TextIOWrapper):
+    """
+    Text file over a decompressing binary file. Its name is the path of the compressed file,
+    and it has no file descriptor, so readers never memory map the compressed bytes
+    """
+    def __init__(self, buffer, path):
+        super().__init__(buffer)
+        self._path = path
+
+    @property
+    def name(self):
+        return self._path
+
+    def fileno(self):
+        raise io.UnsupportedOperation("compressed files have no file descriptor to read directly")
+
+def _open_decompressed(fp, compression):
+    # Decompression modules are imported here, as most inputs are plain text
+    if compression in ("gzip", "bgzf"):
+        import gzip
+        return gzip.GzipFile(fileobj=fp, mode="rb")
+    if compression == "bz2":
+        import bz2
+        return bz2.BZ2File(fp, "rb")
+    import lzma
+    return lzma.LZMAFile(fp, "rb")
+
+def open_fasta(path, mode="r"):
+    """
+    Open a FASTA file for reading, decompressing it on the fly if it is gzip, BGZF, bzip2 or xz compressed
+    Compression is detected from the file contents, so no extension is required. The file is only opened once:
+    its leading bytes are peeked at through the buffer of the binary file, which is then read as text or decompressed
+    path: Path to the FASTA file
+    mode: "r" for a text file object, "rb" for a binary one
+    """
+    fp = open(path, "rb")
+    try:
+        compression = _compression_of(fp.peek(BGZF_HEADER_SIZE)[:BGZF_HEADER_SIZE])
+        if compression is None:
+            return fp if mode == "rb" else io.TextIOWrapper(fp)
+        decompressed = _DecompressedFile(_open_decompressed(fp, compression), fp)
+    except BaseException:
+        fp.close()
+        raise
+
+    if mode == "rb":
+        return decompressed
+    return _CompressedTextFile(decompressed, path)
+
+def iter_bgzf_blocks(fp):
+    """
+    Yield the compressed offset, compressed size and uncompressed size of every block of a BGZF file, without inflating any of them
+    fp: BGZF file opened in binary mode, positioned at the start of the file
+    Raises ValueError if the file is not BGZF
+    """
+    compressed_offset = 0
+    while True:
+        header = fp.read(BGZF_HEADER_SIZE)
+        if not header:
+            return
+        if not _is_bgzf_header(header):
+            raise ValueError(f"{getattr(fp, 'name', 'File')} is not BGZF compressed at offset {compressed_offset}")
+        block_size = int.from_bytes(header[16:18], "little") + 1
+        # The uncompressed size of a block is the last field of its gzip trailer
+        fp.seek(compressed_offset + block_size - 4)
+        uncompressed_size = int.from_bytes(fp.read(4), "little")
+        yield compressed_offset, block_size, uncompressed_size
+        compressed_offset += block_size
+
+class BgzfReader:
+    """
+    Random access reader for a BGZF file, addressed by offsets into the uncompressed data
+    Only the blocks holding the bytes being read are inflated
+    path: Path of the BGZF file
+    blocks: (compressed offset, uncompressed offset) of the start of every block after the first, as stored in a .gzi index (see load_gzi)
+    """
+    def __init__(self, path, blocks):
+        self.name = path
+        self.fp = open(path, "rb")
+        self.compressed_offsets = [0] + [i[0] for i in blocks]
+        self.uncompressed_offsets = [0] + [i[1] for i in blocks]
+        self.position = 0
+
+    def seek(self, offset):
+        self.position = offset
+        return offset
+
+    def tell(self):
+        return self.position
+
+    def _read_block(self):
+        header = self.fp.read(BGZF_HEADER_SIZE)
+        if len(header) < BGZF_HEADER_SIZE:
+            return None
+        block_size = int.from_bytes(header[16:18], "little") + 1
+        compressed = self.fp.read(block_size - BGZF_HEADER_SIZE)
+        # Raw deflate data, without the 8 byte gzip trailer
+        return zlib.decompress(compressed[:-8], -15)
+
+    def read(self, size):
+        block_index = bisect_right(self.uncompressed_offsets, self.position) - 1
+        skip = self.position - self.uncompressed_offsets[block_index]
+        self.fp.seek(self.compressed_offsets[block_index])
+
+        parts = []
+        remaining = skip + size
+        while remaining > 0:
+            block = self._read_block()
+            if block is None:
+                break
+            parts.append(block)
+            remaining -= len(block)
+
+        data = b"".join(parts)[skip:skip + size]
+        self.position += len(data)
+        return data
+
+    def close(self):
+        self.fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,90 @@
+from samplesheetutils.utils.sample import Sample
+from samplesheetutils.utils.pipeline import sequence_digest
+from itertools import islice
+import os, sqlite3
+
+# Number of samples inserted per transaction
+SQLITE_BATCH_SIZE = 10000
+
+def _sample_rows(samples):
+    for sample in samples:
+        data = sample.data
+        yield (sample.name, sample.path, len(data), sample.msa, sequence_digest(data).hex(), data)
+
+def create_sqlite(samples, path, batch_size=SQLITE_BATCH_SIZE):
+    """
+    Write samples to an SQLite samplesheet, with indexes on sample name and sequence length, so single samples or length ranges
+    can be looked up without reading the whole samplesheet
+    The samples table has the columns name, path, length, msa, sequence_hash (see sequence_digest) and sequence, in input order.
+    The database is built under a temporary name and renamed into place, replacing any existing file
+    samples: Iterable of Sample objects with amino acid data. It is consumed as the database is written
+    path: Path of the database file
+    batch_size: Number of samples inserted per transaction
+    Returns the number of samples written
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    connection = sqlite3.connect(temp_path)
+    count = 0
+    try:
+        # The file is only renamed into place once complete, so it does not need a journal to survive a crash
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("""
+            CREATE TABLE samples (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                path TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                msa TEXT,
+                sequence_hash TEXT NOT NULL,
+                sequence TEXT NOT NULL
+            )""")
+
+        rows = _sample_rows(samples)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            with connection:
+                connection.executemany("INSERT INTO samples (name, path, length, msa, sequence_hash, sequence) VALUES (?, ?, ?, ?, ?, ?)", batch)
+            count += len(batch)
+
+        # Indexes are built once all rows are in, which is much faster than updating them on every insert
+        with connection:
+            connection.execute("CREATE INDEX samples_name ON samples (name)")
+            connection.execute("CREATE INDEX samples_length ON samples (length)")
+        connection.close()
+        os.replace(temp_path, path)
+    except BaseException:
+        connection.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return count
+
+def sqlite_source(path, min_length=None, max_length=None):
+    """
+    Yield the samples of an SQLite samplesheet (see create_sqlite) in their original order, to export them to another format
+    path: Path of the database file
+    min_length, max_length: Optional inclusive range of sequence lengths to select, looked up through the length index
+    """
+    if not os.path.isfile(path):
+        raise ValueError(f"SQLite samplesheet {path} does not exist")
+
+    conditions = []
+    parameters = []
+    if min_length is not None:
+        conditions.append("length >= ?")
+        parameters.append(min_length)
+    if max_length is not None:
+        conditions.append("length <= ?")
+        parameters.append(max_length)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+
+    connection = sqlite3.connect(path)
+    try:
+        for name, sample_path, msa, sequence in connection.execute(f"SELECT name, path, msa, sequence FROM samples{where} ORDER BY id", parameters):
+            yield Sample(name, sample_path, sequence, msa)
+    finally:
+        connection.close()
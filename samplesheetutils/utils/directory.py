@@ -0,0 +1,54 @@
+import os, re
+
+# Index files written next to FASTA files (see samplesheetutils.utils.index), which are never inputs themselves
+INDEX_EXTENSIONS = (".fai", ".gzi", ".ssidx")
+
+def find_files(directory, pattern=None, recursive=False, exclude=()):
+    """
+    Yield the path of every file in a directory whose path matches a regex, as the directory is read
+    File types come from the directory listing itself where the filesystem provides them, so no stat is made per file
+    directory: Directory to search
+    pattern: Regex (string or compiled) searched for in each file path. If unset, every file is yielded
+    recursive: Also search subdirectories. Symbolic links to directories are not followed
+    exclude: File extensions to skip, even if the path matches pattern
+    """
+    if isinstance(pattern, str):
+        pattern = re.compile(pattern)
+
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file():
+                if (pattern is None or pattern.search(entry.path)) and not entry.name.endswith(exclude):
+                    yield entry.path
+            elif recursive and entry.is_dir(follow_symlinks=False):
+                yield from find_files(entry.path, pattern, recursive, exclude)
+
+MSA_EXTENSIONS = (".a3m", ".m3a")
+
+def index_msa_dir(msa_dir, extensions=MSA_EXTENSIONS, recursive=False):
+    """
+    Scan a directory once and return a dictionary mapping sample names to MSA file paths
+    The sample name of an MSA is its filename without the extension, e.g. A1.a3m is the MSA of sample A1.
+    If a sample has several MSAs, files closer to msa_dir win, then earlier extensions in the list
+    msa_dir: Directory containing MSA files
+    extensions: MSA file extensions to look for
+    recursive: Also index MSAs in subdirectories, e.g. per-sample directories like [msa_dir]/A1/A1.a3m
+    """
+    ranked = {}
+    directories = [(msa_dir, 0)]
+
+    while directories:
+        directory, depth = directories.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    name, extension = os.path.splitext(entry.name)
+                    if extension not in extensions:
+                        continue
+                    rank = (depth, extensions.index(extension))
+                    if name not in ranked or rank < ranked[name][0]:
+                        ranked[name] = (rank, entry.path)
+                elif recursive and entry.is_dir(follow_symlinks=False):
+                    directories.append((entry.path, depth + 1))
+
+    return {name: path for name, (rank, path) in ranked.items()}
@@ -1,55 +1,285 @@
-from samplesheetutils.utils.sample import Sample
-from typing import Union
-import re 
+from __future__ import annotations
+from samplesheetutils.utils.sample import Sample, LazySample
+from samplesheetutils.utils.compression import open_fasta
+from collections import deque
+import mmap, os, stat, threading
 
-def read_fasta(fp, read_data=False, single_line=True):
+FASTA_WRITE_BUFFER_SIZE = 1 << 20
+
+def _iter_headers_mapped(mm, path, encoding, single_line):
     """
-    Read in a FASTA file and return an array containing sequence data
-    read_data: Controls if the amino acid sequences are read into the Sample object
-    single_line: Return after reading the first header
+    Yield a Sample for every header in a memory mapped FASTA file. Only header bytes are decoded
+    """
+    if mm[:1] == b">":
+        header_start = 0
+    else:
+        header_start = mm.find(b"\n>") + 1
+        if header_start == 0:
+            return
+
+    while True:
+        header_end = mm.find(b"\n", header_start)
+        if header_end == -1:
+            header_end = len(mm)
+        yield Sample(mm[header_start + 1:header_end].decode(encoding).strip(), path, "")
+        if single_line:
+            return
+        # The newline ending this header is where the search for the next one starts
+        header_start = mm.find(b"\n>", header_end) + 1
+        if header_start == 0:
+            return
+
+def _iter_records_mapped(mm, path, encoding, single_line):
+    """
+    Yield a LazySample for every record in a memory mapped FASTA file. Only header bytes are decoded
+    """
+    if mm[:1] == b">":
+        header_start = 0
+    else:
+        header_start = mm.find(b"\n>") + 1
+        if header_start == 0:
+            return
+
+    while True:
+        header_end = mm.find(b"\n", header_start)
+        if header_end == -1:
+            header_end = len(mm)
+        name = mm[header_start + 1:header_end].decode(encoding).strip()
+        if single_line:
+            # Like iter_fasta, reading stops at the first header, before its sequence
+            yield Sample(name, path, "")
+            return
+        next_header = mm.find(b"\n>", header_end) + 1
+        yield LazySample(name, path, mm, header_end + 1, next_header if next_header else len(mm), encoding)
+        if not next_header:
+            return
+        header_start = next_header
+
+def _cr_line_endings(mm):
+    """
+    Check if a memory mapped file ends its first line with a lone carriage return (classic Mac line endings),
+    which the byte scans cannot split on but universal newline text reading can
     """
+    cr = mm.find(b"\r")
+    if cr == -1:
+        return False
+    lf = mm.find(b"\n", 0, cr + 2)
+    return lf == -1 or lf > cr + 1
 
-    fasta_samples = []
+def _map_file(fp):
+    """
+    Memory map an open file for reading, or return None if it is not a non-empty regular file (pipes, in-memory and compressed files),
+    or if its lines end with a lone carriage return
+    """
+    try:
+        fileno = fp.fileno()
+        file_stat = os.fstat(fileno)
+        if stat.S_ISREG(file_stat.st_mode) and file_stat.st_size > 0:
+            mm = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+            if not _cr_line_endings(mm):
+                return mm
+            mm.close()
+    except (AttributeError, OSError, ValueError):
+        # Not backed by a regular file
+        pass
+    return None
+
+def iter_fasta_headers(fp, single_line=False):
+    """
+    Yield a Sample object for every header in a FASTA file without reading sequence data
+    Regular files are memory mapped and scanned for headers as raw bytes, so sequence lines are never decoded.
+    Other file objects (pipes, in-memory files) fall back to skipping sequence lines one at a time
+    fp: Open file object, positioned at the start of the file
+    single_line: Stop after reading the first header
+    """
+    mm = _map_file(fp)
+    if mm is not None:
+        with mm:
+            yield from _iter_headers_mapped(mm, fp.name, getattr(fp, "encoding", None) or "utf-8", single_line)
+        return
+
+    for fasta_line in fp:
+        if fasta_line.startswith(">"):
+            yield Sample(fasta_line[1:].strip(), fp.name, "")
+            if single_line:
+                return
+
+def iter_fasta(fp, read_data=True, single_line=False, lazy=False):
+    """
+    Lazily read a FASTA file, yielding one Sample object per record
+    fp: Open file object. Lines are pulled through the file's own buffered reader, so only the current record is held in memory
+    read_data: Controls if the amino acid sequences are read into the Sample object. If unset, only headers are scanned (see iter_fasta_headers)
+    single_line: Stop after reading the first header
+    lazy: Yield LazySample objects, whose sequences stay in the memory mapped file until they are used.
+        Only regular, uncompressed files are mapped. Other file objects are read as usual
+    """
+    if not read_data:
+        yield from iter_fasta_headers(fp, single_line=single_line)
+        return
 
-    lines = fp.readlines()
+    if lazy:
+        mm = _map_file(fp)
+        if mm is not None:
+            # The mapping is closed once the last sample referring to it is gone
+            yield from _iter_records_mapped(mm, fp.name, getattr(fp, "encoding", None) or "utf-8", single_line)
+            return
 
     temp_sample_object = None
+    # Sequence lines are collected and joined once per record, as repeated string
+    # concatenation is quadratic on long fixed-width records
+    sequence_parts = []
 
-    for fasta_line in lines:
-        if re.search("^\\>.*$", fasta_line):
+    for fasta_line in fp:
+        if fasta_line.startswith(">"):
             # This is to add support for fixed-width fasta files
             if temp_sample_object is not None:
-                fasta_samples.append(temp_sample_object)
+                temp_sample_object.data = "".join(sequence_parts)
+                yield temp_sample_object
             temp_sample_object = Sample(fasta_line[1:].strip(), fp.name, "")
+            sequence_parts = []
             if single_line:
                 break
         elif temp_sample_object is not None:
-            temp_sample_object.data += fasta_line.strip()
+            sequence_parts.append(fasta_line.strip())
 
     if temp_sample_object is not None:
-        fasta_samples.append(temp_sample_object)
+        temp_sample_object.data = "".join(sequence_parts)
+        yield temp_sample_object
+
+def read_fasta(fp, read_data=False, single_line=True, lazy=False):
+    """
+    Read in a FASTA file and return an array containing sequence data
+    read_data: Controls if the amino acid sequences are read into the Sample object
+    single_line: Return after reading the first header
+    lazy: Leave sequences in the memory mapped file until they are used (see iter_fasta)
+    """
+
+    fasta_samples = list(iter_fasta(fp, read_data=read_data, single_line=single_line, lazy=lazy))
 
     fp.close()
 
     return fasta_samples
 
-def make_fasta(sample: Union[Sample, list], header='>', fixed_width=False, fixed_width_column_count=80):
+def default_jobs():
+    """
+    Number of workers to use when none is given: the number of cores this process may run on
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def _read_fasta_path(path, read_data, single_line, lazy=False):
+    with open_fasta(path) as fp:
+        return read_fasta(fp, read_data=read_data, single_line=single_line, lazy=lazy)
+
+def read_fasta_files(paths, read_data=False, single_line=True, jobs=None, processes=False, lazy=False):
+    """
+    Read many FASTA files concurrently, yielding the list of samples of each file in the same order as paths
+    paths: Iterable of FASTA file paths. Compressed files are decompressed as they are read (see open_fasta)
+    read_data: Controls if the amino acid sequences are read into the Sample objects
+    single_line: Only read the first sample of each file
+    jobs: Number of files read at once. Defaults to the number of available cores. 1 reads the files in this thread
+    processes: Use a process pool instead of a thread pool. Threads suit many small files on slow storage, processes suit large files
+    lazy: Leave sequences in the memory mapped files until they are used (see iter_fasta). Ignored with processes, as mappings cannot be sent between processes
+    """
+    if jobs is None:
+        jobs = default_jobs()
+    lazy = lazy and not processes
+
+    if jobs <= 1:
+        for path in paths:
+            yield _read_fasta_path(path, read_data, single_line, lazy)
+        return
+
+    # Imported here, as worker pools are not needed for single files and take a while to import
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    # Only a few files per worker are in flight at once, so paths can be a lazy iterable of any length
+    max_pending = jobs * 4
+    pending = deque()
+
+    with executor_class(max_workers=jobs) as executor:
+        for path in paths:
+            pending.append(executor.submit(_read_fasta_path, path, read_data, single_line, lazy))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def _write_fasta_record(fp, sample, header, fixed_width, fixed_width_column_count):
+    fp.write(f"{header}{sample.name}\n")
+    sample_data = sample.data
+    if fixed_width and len(sample_data) > fixed_width_column_count:
+        # Slices are written straight to the buffered file, rather than joined into a second copy of the sequence
+        fp.write(sample_data[:fixed_width_column_count])
+        for i in range(fixed_width_column_count, len(sample_data), fixed_width_column_count):
+            fp.write("\n")
+            fp.write(sample_data[i:i+fixed_width_column_count])
+    else:
+        fp.write(sample_data)
+
+def _make_fasta_file(si, header, fixed_width, fixed_width_column_count, atomic):
+    if not atomic:
+        with open(si.path, "w") as fp:
+            _write_fasta_record(fp, si, header, fixed_width, fixed_width_column_count)
+        return
+
+    # The temporary file sits next to the destination so the rename cannot cross filesystems
+    temp_path = f"{si.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, "x") as fp:
+            _write_fasta_record(fp, si, header, fixed_width, fixed_width_column_count)
+        os.replace(temp_path, si.path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def make_fasta(sample: Sample | list, header='>', fixed_width=False, fixed_width_column_count=80, jobs=1, atomic=False):
     """
     Write a FASTA file given a Sample object or a list of Sample objects. The Sample object must contain amino acid data.
     sample: Single Sample object or a list of Samples
     header: The header character for each sample. It is recommended not to change this
     fixed_width: Controls if amino acid data is written with line breaks every n characters, or not
     fixed_width_column_count: Controls how often the amino acid data is broken up
+    jobs: Number of files written at once. More than one uses a thread pool, which hides open/close latency on networked filesystems
+    atomic: Write each file under a temporary name and rename it into place, so a FASTA file is never seen half written
     """
     if type(sample) is not list:
         sample = [sample]
 
-    for si in sample:
-        with open(si.path, "w") as fp:
-            sample_data = si.data
-            if fixed_width:
-                sample_data = '\n'.join([sample_data[i:i+fixed_width_column_count] for i in range(0, len(sample_data), fixed_width_column_count)]) 
-            fp.write(f"{header}{si.name}\n{sample_data}")
-            fp.flush()
+    if jobs is None:
+        jobs = default_jobs()
+
+    if jobs <= 1 or len(sample) <= 1:
+        for si in sample:
+            _make_fasta_file(si, header, fixed_width, fixed_width_column_count, atomic)
+        return
 
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        # Consuming the results raises the first error, if any
+        for _ in executor.map(lambda si: _make_fasta_file(si, header, fixed_width, fixed_width_column_count, atomic), sample):
+            pass
 
+def write_multi_fasta(samples, path, header='>', fixed_width=False, fixed_width_column_count=80, buffer_size=FASTA_WRITE_BUFFER_SIZE, atomic=False):
+    """
+    Write many samples as the records of a single FASTA file. Each record ends with a line break
+    samples: Iterable of Sample objects with amino acid data
+    path: Path of the FASTA file to write
+    buffer_size: Size of the write buffer in bytes
+    Other arguments are the same as make_fasta
+    """
+    write_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp" if atomic else path
+    try:
+        with open(write_path, "x" if atomic else "w", buffering=buffer_size) as fp:
+            for si in samples:
+                _write_fasta_record(fp, si, header, fixed_width, fixed_width_column_count)
+                fp.write("\n")
+        if atomic:
+            os.replace(write_path, path)
+    except BaseException:
+        if atomic and os.path.exists(write_path):
+            os.remove(write_path)
+        raise
@@ -0,0 +1,348 @@
+from samplesheetutils.utils.sample import Sample
+from samplesheetutils.utils.compression import BgzfReader, detect_compression, iter_bgzf_blocks, open_fasta
+from samplesheetutils.utils.fasta import _cr_line_endings
+from collections import namedtuple
+import mmap, os, threading
+
+# Same columns, in the same order, as a samtools faidx .fai file
+FaiEntry = namedtuple("FaiEntry", ["name", "length", "offset", "line_bases", "line_width"])
+# Names hold the full header, where samtools only keeps its first word, so the index is not saved as [FASTA].fai:
+# samtools would misread it, and a samtools index would give the wrong names
+INDEX_SUFFIX = ".ssidx"
+
+def fai_path(path):
+    return path + INDEX_SUFFIX
+
+# Whitespace rstrip removes from a sequence line, as bytes
+_LINE_WHITESPACE = b" \t\r\n\x0b\x0c"
+
+def _uneven_lines(name, path):
+    return ValueError(f"Record {name} in {path} has lines of differing length and cannot be indexed")
+
+def _index_record_lines(record, name, path):
+    """
+    Return the length, bases per line and bytes per line of the sequence lines of a record, one line at a time like _build_fai_lines
+    record: Bytes of the record's sequence lines
+    """
+    length = 0
+    line_bases = 0
+    record_line_width = 0
+    record_ended = False
+    start = 0
+
+    while start < len(record):
+        line_end = record.find(b"\n", start)
+        line_end = len(record) if line_end == -1 else line_end + 1
+        line_width = line_end - start
+        bases = len(record[start:line_end].rstrip())
+        if bases:
+            if record_ended or (line_bases and bases > line_bases):
+                raise _uneven_lines(name, path)
+            if line_bases == 0:
+                line_bases = bases
+                record_line_width = line_width
+            length += bases
+        if bases < line_bases or line_width != record_line_width:
+            record_ended = True
+        start = line_end
+
+    return length, line_bases, record_line_width
+
+def _index_record(record, name, path):
+    """
+    Return the length, bases per line and bytes per line of the sequence lines of a record, with the same checks as _build_fai_lines
+    Lines are checked together with bulk byte operations, such as strided slices taking one byte per line, rather than one at a time.
+    Records that do not pass these checks are read one line at a time (see _index_record_lines), to find the exact problem
+    record: Bytes of the record's sequence lines
+    """
+    first_end = record.find(b"\n")
+    if first_end == -1:
+        return _index_record_lines(record, name, path)
+    line_width = first_end + 1
+
+    # Lines as wide as the first, from the start of the record, end with a line break at the same column
+    line_ends = record[first_end::line_width]
+    full_lines = len(line_ends) - len(line_ends.lstrip(b"\n"))
+    full_end = full_lines * line_width
+
+    # Most records have \n line endings and no other whitespace, so every line break but the one ending a shorter last line is a full line's
+    line_breaks = record.count(b"\n")
+    last_line_width = len(record) - full_end
+    if (first_end and last_line_width < line_width and (line_breaks == full_lines or (line_breaks == full_lines + 1 and last_line_width and record[-1:] == b"\n"))
+            and len(record.translate(None, _LINE_WHITESPACE)) + line_breaks == len(record)):
+        return len(record) - line_breaks, first_end, line_width
+
+    line_bases = len(record[:first_end].rstrip())
+    if line_bases == 0:
+        return _index_record_lines(record, name, path)
+
+    # Each of those lines must be a single line with a base in the last base column, and the same line ending as the first line
+    last_bases = record[line_bases - 1:full_end:line_width]
+    if record.count(b"\n", 0, full_end) != full_lines or len(last_bases.translate(None, _LINE_WHITESPACE)) != full_lines:
+        return _index_record_lines(record, name, path)
+    for column in range(line_bases, line_width - 1):
+        if record[column:full_end:line_width] != record[column:column + 1] * full_lines:
+            return _index_record_lines(record, name, path)
+
+    # Only the last line may be shorter, and only blank lines may follow it
+    last_line, _, rest = record[full_end:].partition(b"\n")
+    last_line_bases = len(last_line.rstrip())
+    if last_line_bases > line_bases or rest.strip():
+        raise _uneven_lines(name, path)
+
+    return full_lines * line_bases + last_line_bases, line_bases, line_width
+
+def _build_fai_mapped(mm, path):
+    entries = []
+    if mm[:1] == b">":
+        header_start = 0
+    else:
+        header_start = mm.find(b"\n>") + 1
+        if header_start == 0:
+            return entries
+
+    size = len(mm)
+    while True:
+        header_end = mm.find(b"\n", header_start)
+        if header_end == -1:
+            header_end = size
+        name = mm[header_start + 1:header_end].strip().decode()
+        seq_offset = header_end + 1 if header_end < size else size
+        next_header = mm.find(b"\n>", header_end) + 1
+        # Each record is copied out of the mapping once, as slicing bytes is much faster than slicing the mapping
+        length, line_bases, line_width = _index_record(mm[seq_offset:next_header or size], name, path)
+        entries.append(FaiEntry(name, length, seq_offset, line_bases, line_width))
+        if not next_header:
+            return entries
+        header_start = next_header
+
+def _build_fai_lines(path):
+    entries = []
+    name = None
+    offset = 0
+    # State of the current record, reset at every header
+    length = 0
+    seq_offset = 0
+    line_bases = 0
+    record_line_width = 0
+    record_ended = False
+
+    with open_fasta(path, "rb") as fp:
+        for line in fp:
+            line_width = len(line)
+            if line.startswith(b">"):
+                if name is not None:
+                    entries.append(FaiEntry(name, length, seq_offset, line_bases, record_line_width))
+                name = line[1:].strip().decode()
+                seq_offset = offset + line_width
+                length = 0
+                line_bases = 0
+                record_line_width = 0
+                record_ended = False
+            elif name is not None:
+                bases = len(line.rstrip())
+                if bases:
+                    if record_ended:
+                        raise _uneven_lines(name, path)
+                    if line_bases == 0:
+                        line_bases = bases
+                        record_line_width = line_width
+                    elif bases > line_bases:
+                        raise _uneven_lines(name, path)
+                    length += bases
+                # Only the last line of a record may be shorter than the first
+                if bases < line_bases or line_width != record_line_width:
+                    record_ended = True
+            offset += line_width
+
+    if name is not None:
+        entries.append(FaiEntry(name, length, seq_offset, line_bases, record_line_width))
+
+    return entries
+
+def build_fai(path):
+    """
+    Scan a FASTA file and return a list of FaiEntry objects, one per record
+    Unlike samtools, the name is the full header line (as returned by read_fasta), not only its first word.
+    Plain files are memory mapped and scanned as raw bytes, like iter_fasta_headers. Compressed files are read one line at a time,
+    and their offsets are positions in the uncompressed data, like samtools indexes of bgzip files
+    path: Path to the FASTA file, optionally compressed (see open_fasta)
+    Raises ValueError if a record has lines of differing length before its last line, as such records cannot be seeked into,
+    or if lines end with a lone carriage return
+    """
+    if detect_compression(path) is not None:
+        return _build_fai_lines(path)
+
+    with open(path, "rb") as fp:
+        if os.fstat(fp.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if _cr_line_endings(mm):
+                raise ValueError(f"{path} has carriage return line endings and cannot be indexed")
+            return _build_fai_mapped(mm, path)
+
+def write_fai(entries, fp):
+    for entry in entries:
+        fp.write(f"{entry.name}\t{entry.length}\t{entry.offset}\t{entry.line_bases}\t{entry.line_width}\n")
+    fp.flush()
+
+def read_fai(fp):
+    entries = []
+    for line in fp:
+        name, length, offset, line_bases, line_width = line.rstrip("\n").rsplit("\t", 4)
+        entries.append(FaiEntry(name, int(length), int(offset), int(line_bases), int(line_width)))
+    return entries
+
+def _replace_file(path, write, mode="w"):
+    """
+    Write a file under a temporary name and rename it into place, so concurrent readers never see it half written
+    write: Function writing the contents to an open file object
+    """
+    # The temporary file sits next to the destination so the rename cannot cross filesystems
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, mode.replace("w", "x")) as fp:
+            write(fp)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def _index_stamp(fasta_stat, entries):
+    # First line of a saved index: the size and modification time of the FASTA file it was built from, and its number of records
+    return f"#{fasta_stat.st_size}\t{fasta_stat.st_mtime_ns}\t{len(entries)}\n"
+
+def load_fai(path, write=True):
+    """
+    Return the index of a FASTA file, reusing [path].ssidx while the FASTA file has the size and modification time it was built from
+    A stale or missing index is rebuilt, and saved next to the FASTA file when possible. Indexes of gzip, bzip2 and xz files are
+    never saved, as those files cannot be seeked into: only plain and BGZF files get one
+    path: Path to the FASTA file
+    write: Controls if a rebuilt index is saved
+    """
+    index_path = fai_path(path)
+    fasta_stat = os.stat(path)
+
+    try:
+        with open(index_path, "r") as fp:
+            stamp = fp.readline()
+            entries = read_fai(fp)
+        # Any difference, including a replacement file with an older modification time, means the index is stale
+        if stamp == _index_stamp(fasta_stat, entries):
+            return entries
+    except (OSError, ValueError):
+        pass
+
+    entries = build_fai(path)
+
+    if write and detect_compression(path) in (None, "bgzf"):
+        def write_index(fp):
+            fp.write(_index_stamp(fasta_stat, entries))
+            write_fai(entries, fp)
+        try:
+            _replace_file(index_path, write_index)
+        except OSError:
+            # Read-only directories still get the in-memory index
+            pass
+
+    return entries
+
+def gzi_path(path):
+    return path + ".gzi"
+
+def build_gzi(path):
+    """
+    Scan the block headers of a BGZF file and return the (compressed offset, uncompressed offset) of every block after the first,
+    the same entries as a samtools/bgzip .gzi index. No block is inflated
+    path: Path to the BGZF file
+    Raises ValueError if the file is not BGZF
+    """
+    blocks = []
+    uncompressed_offset = 0
+
+    with open(path, "rb") as fp:
+        for compressed_offset, block_size, uncompressed_size in iter_bgzf_blocks(fp):
+            if compressed_offset:
+                blocks.append((compressed_offset, uncompressed_offset))
+            uncompressed_offset += uncompressed_size
+
+    return blocks
+
+def write_gzi(blocks, fp):
+    """
+    Write a .gzi index: the number of entries, then each entry's compressed and uncompressed offsets, all as little endian 64 bit integers
+    fp: File object opened in binary mode
+    """
+    fp.write(len(blocks).to_bytes(8, "little"))
+    for compressed_offset, uncompressed_offset in blocks:
+        fp.write(compressed_offset.to_bytes(8, "little"))
+        fp.write(uncompressed_offset.to_bytes(8, "little"))
+    fp.flush()
+
+def read_gzi(fp):
+    data = fp.read()
+    count = int.from_bytes(data[:8], "little")
+    if len(data) != 8 + count * 16:
+        raise ValueError("Truncated .gzi index")
+    return [(int.from_bytes(data[i:i+8], "little"), int.from_bytes(data[i+8:i+16], "little")) for i in range(8, len(data), 16)]
+
+def load_gzi(path, write=True):
+    """
+    Return the block index of a BGZF file, reusing [path].gzi when it is newer than the BGZF file
+    A stale or missing index is rebuilt, and saved next to the BGZF file when possible
+    path: Path to the BGZF file
+    write: Controls if a rebuilt index is saved
+    """
+    index_path = gzi_path(path)
+
+    try:
+        if os.stat(index_path).st_mtime >= os.stat(path).st_mtime:
+            with open(index_path, "rb") as fp:
+                return read_gzi(fp)
+    except (OSError, ValueError):
+        pass
+
+    blocks = build_gzi(path)
+
+    if write:
+        try:
+            _replace_file(index_path, lambda fp: write_gzi(blocks, fp), "wb")
+        except OSError:
+            pass
+
+    return blocks
+
+def record_span(entry):
+    """
+    Number of bytes a record's sequence occupies on disk, including line breaks
+    """
+    if entry.line_bases == 0:
+        return 0
+    full_lines, remainder = divmod(entry.length, entry.line_bases)
+    return full_lines * entry.line_width + remainder
+
+def read_indexed(path, entries, read_data=True):
+    """
+    Yield a Sample object for each of the given index entries, seeking directly to the sequence data
+    BGZF files are seeked into through their .gzi index (see load_gzi), inflating only the blocks holding each record.
+    Other compressed files are decompressed up to each record
+    path: Path to the FASTA file the entries belong to
+    entries: FaiEntry objects, usually a subset of load_fai(path)
+    read_data: Controls if the amino acid sequences are read into the Sample object
+    """
+    if not read_data:
+        for entry in entries:
+            yield Sample(entry.name, path, "")
+        return
+
+    if detect_compression(path) == "bgzf":
+        fasta_fp = BgzfReader(path, load_gzi(path))
+    else:
+        fasta_fp = open_fasta(path, "rb")
+
+    with fasta_fp as fp:
+        for entry in entries:
+            fp.seek(entry.offset)
+            data = fp.read(record_span(entry)).translate(None, b"\r\n")
+            yield Sample(entry.name, path, data.decode())
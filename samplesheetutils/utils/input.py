@@ -1,5 +1,35 @@
-def sanitize_input(input_str, disallowed_chars = [',', ' ', '<', '>', '.', "'", '"', ';', ':', '(', ')'], replcement='_'):
+DISALLOWED_CHARS = (',', ' ', '<', '>', '.', "'", '"', ';', ':', '(', ')')
+
+def sanitize_input(input_str, disallowed_chars = DISALLOWED_CHARS, replcement='_'):
+    # One str.replace per character is faster in CPython than str.translate, as each is a vectorised scan
     for i in disallowed_chars:
-        input_str = input_str.replace(i, '_')
+        input_str = input_str.replace(i, replcement)
     return input_str
 
+def sanitize_many(input_strs, disallowed_chars = DISALLOWED_CHARS, replcement='_'):
+    """
+    Sanitise a list of strings at once, returning a list (see sanitize_input)
+    The strings are joined into one string, so there are only as many str.replace calls as disallowed characters
+    """
+    input_strs = list(input_strs)
+    joined = "\n".join(input_strs)
+
+    # Fall back to one string at a time if the separator could be confused with the data
+    if "\n" in disallowed_chars or "\n" in replcement or joined.count("\n") != max(len(input_strs) - 1, 0):
+        return [sanitize_input(i, disallowed_chars, replcement) for i in input_strs]
+    if not input_strs:
+        return []
+
+    return sanitize_input(joined, disallowed_chars, replcement).split("\n")
+
+def sanitize_collisions(input_strs, disallowed_chars = DISALLOWED_CHARS, replcement='_'):
+    """
+    Find distinct strings that sanitise to the same string
+    Returns a dictionary mapping each such sanitised string to the distinct strings that produced it, in input order
+    """
+    input_strs = list(input_strs)
+    sources = {}
+    for input_str, sanitized in zip(input_strs, sanitize_many(input_strs, disallowed_chars, replcement)):
+        sources.setdefault(sanitized, {})[input_str] = None
+
+    return {sanitized: list(originals) for sanitized, originals in sources.items() if len(originals) > 1}
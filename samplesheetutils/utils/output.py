@@ -1,5 +1,8 @@
-from samplesheetutils.utils.input import *
-import csv, yaml, json
+from samplesheetutils.utils.input import sanitize_input
+from functools import lru_cache
+import re
+
+# yaml and json are imported by the writers that use them, so the commands only pay for the format they write
 
 def create_csv(data, header_seq, header_fasta, fp):
     fp.write(f"{header_seq},{header_fasta}\n")
@@ -7,32 +10,98 @@ def create_csv(data, header_seq, header_fasta, fp):
         fp.write(sanitize_input(row.name) + "," + row.path + "\n")
     fp.flush()
 
-def create_yaml_boltz(data, fp):
-    output_data = {
-        "version": 1,
-        "sequences": []
-    }
-    for row in data:
-        append_data = {"protein": {
-            "id": row.name[:min(4,len(row.name))],
-            "sequence": row.data
-        }}
-        if row.msa:
-            append_data["protein"]["msa"] = row.msa
-        #output_data["sequences"].append({"protein": {
-        #    "id": row.name[:min(4,len(row.name))],
-        #    "sequence": row.data
-        #}})
-        output_data["sequences"].append(append_data)
-
-    yaml.dump(output_data, fp, default_flow_style=False)
+# Scalars made only of these characters are written unquoted by PyYAML, unless they resolve to another type (e.g. NO, 1e5, null)
+_YAML_PLAIN_SCALAR = re.compile(r"[A-Za-z0-9_./][A-Za-z0-9_./\-]*\Z")
+
+@lru_cache(maxsize=None)
+def _yaml_resolver():
+    import yaml
+    return yaml.resolver.Resolver()
+
+def _yaml_plain(value):
+    import yaml
+    return (isinstance(value, str)
+        and _YAML_PLAIN_SCALAR.match(value) is not None
+        and not value.startswith("...")
+        and _yaml_resolver().resolve(yaml.ScalarNode, value, (True, False)) == "tag:yaml.org,2002:str")
+
+def chain_id(index):
+    """
+    Chain id of the index-th chain of a complex: A to Z, then AA, AB and so on
+    """
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+def _yaml_boltz_entry(row, id=None):
+    """
+    Serialise one sample as an item of the Boltz sequences list, exactly as yaml.dump would
+    id: Chain id. Defaults to the first 4 characters of the sample name
+    """
+    if id is None:
+        id = row.name[:min(4,len(row.name))]
+    fields = [("id", id)]
+    if row.msa:
+        fields.append(("msa", row.msa))
+    fields.append(("sequence", row.data))
+
+    if all(_yaml_plain(value) for key, value in fields):
+        return "- protein:\n" + "".join(f"    {key}: {value}\n" for key, value in fields)
+
+    # Anything needing quoting or escaping is left to PyYAML
+    import yaml
+    return yaml.dump([{"protein": dict(fields)}], default_flow_style=False)
+
+def create_yaml_boltz(data, fp, chain_ids=False):
+    """
+    Write a Boltz YAML input file, one sample at a time
+    The output is identical to yaml.dump of the whole document, without holding the document in memory
+    data: Iterable of Sample objects
+    fp: Open file object to write to
+    chain_ids: Give the samples the chain ids A, B, C... in order (see chain_id), instead of the start of their names.
+        Boltz rejects documents with repeated ids, which names sharing their first 4 characters would give
+    """
+    empty = True
+    for index, row in enumerate(data):
+        if empty:
+            fp.write("sequences:\n")
+            empty = False
+        fp.write(_yaml_boltz_entry(row, chain_id(index) if chain_ids else None))
+
+    if empty:
+        fp.write("sequences: []\n")
+    fp.write("version: 1\n")
+
+def _json_entity(row):
+    return {"type": "protein", "sequence": row.data, "count": "1"}
 
 def create_json(data, fp):
-    dict_data = {"entities": []}
+    """
+    Write an AlphaFold3 style entities document, one sample at a time
+    data: Iterable of Sample objects
+    fp: Open file object to write to
+    """
+    import json
+    fp.write('{"entities": [')
 
+    separator = ""
     for row in data:
-        dict_data["entities"].append({"type": "protein", "sequence": row.data, "count": "1"})
+        fp.write(separator + json.dumps(_json_entity(row)))
+        separator = ", "
 
-    json.dump(dict_data, fp)
+    fp.write(']}')
     fp.flush()
 
+def create_jsonl(data, fp):
+    """
+    Write one JSON entity per line (JSON Lines), in the same format as the entities of create_json
+    data: Iterable of Sample objects
+    fp: Open file object to write to
+    """
+    import json
+    for row in data:
+        fp.write(json.dumps(_json_entity(row)) + "\n")
+    fp.flush()
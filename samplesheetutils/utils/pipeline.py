@@ -0,0 +1,325 @@
+from samplesheetutils.utils.sample import Sample, sample_name, file_name
+from samplesheetutils.utils.fasta import iter_fasta, read_fasta_files, make_fasta, default_jobs
+from samplesheetutils.utils.input import sanitize_input
+from samplesheetutils.utils.output import create_csv, create_json, create_jsonl, create_yaml_boltz
+from collections import deque
+from contextlib import contextmanager
+from itertools import groupby
+from operator import attrgetter
+import logging, os, threading
+
+logger = logging.getLogger(__name__)
+
+# Samplesheet formats, and the extension of their default output file
+OUTPUT_EXTENSIONS = {
+    "csv": ".csv",
+    "json": ".json",
+    "jsonl": ".jsonl",
+    "yaml": ".yaml",
+}
+
+# Number of FASTA files handed to make_fasta at once by the string sources
+FASTA_BATCH_SIZE = 256
+
+def _aa_string_sample(aa_string, fasta_dir, name=None, seq_chars=6, prefix='manual_entry', suffix='af2', delim='-', extension='fasta', used_names=None):
+    """
+    Create the Sample for an amino acid string, with a path to its FASTA file in fasta_dir
+    If no name is given, the sample name is the start of the sequence (see sample_name)
+    used_names: Optional dictionary of the sanitised names already given out, each mapped to the next index to try for it.
+        A sample whose sanitised name was already used, such as sequences starting with the same residues, gets a running index
+        appended to its name (e.g. MPGAFS_1), so it never shares a FASTA file with an earlier sample
+    """
+    if name is None:
+        name = sample_name(aa_string, seq_chars=seq_chars)
+    sample_id = sanitize_input(name)
+
+    if used_names is not None:
+        if sample_id in used_names:
+            index = used_names[sample_id]
+            # An earlier sample may already be named like a renamed one, e.g. MPGAFS_1
+            while f"{sample_id}_{index}" in used_names:
+                index += 1
+            used_names[sample_id] = index + 1
+            logger.warning(f"Sample name {name} is already used, renaming it to {name}_{index}")
+            name = f"{name}_{index}"
+            sample_id = f"{sample_id}_{index}"
+        used_names[sample_id] = 1
+
+    aa_path = fasta_dir + "/" + file_name(sample_id, prefix=prefix, suffix=suffix, delim=delim, extension=extension)
+
+    return Sample(name, aa_path, aa_string)
+
+def _write_fasta_batches(samples, jobs=1, atomic=False):
+    """
+    Write the FASTA file of every sample, in batches so the files of a batch can be written in parallel, then yield the samples
+    """
+    batch = []
+    for sample in samples:
+        batch.append(sample)
+        if len(batch) >= FASTA_BATCH_SIZE:
+            make_fasta(batch, jobs=jobs, atomic=atomic)
+            yield from batch
+            batch = []
+
+    if batch:
+        make_fasta(batch, jobs=jobs, atomic=atomic)
+        yield from batch
+
+def string_source(aa_string, fasta_dir, seq_chars=6, prefix='manual_entry', suffix='af2', delim='-', extension='fasta', atomic=False):
+    """
+    Yield the Sample for a single amino acid string, writing its FASTA file to fasta_dir
+    The sample name is the start of the sequence (see sample_name)
+    """
+    sample = _aa_string_sample(aa_string, fasta_dir, seq_chars=seq_chars, prefix=prefix, suffix=suffix, delim=delim, extension=extension)
+    make_fasta(sample, atomic=atomic)
+    yield sample
+
+def _aa_file_samples(fp, fasta_dir, seq_chars, prefix, suffix, delim, extension):
+    used_names = {}
+    for line in fp:
+        line = line.strip()
+        if not line:
+            continue
+        if "\t" in line:
+            name, aa_string = line.split("\t", 1)
+            yield _aa_string_sample(aa_string.strip(), fasta_dir, name=name.strip(), prefix=prefix, suffix=suffix, delim=delim, extension=extension, used_names=used_names)
+        else:
+            yield _aa_string_sample(line, fasta_dir, seq_chars=seq_chars, prefix=prefix, suffix=suffix, delim=delim, extension=extension, used_names=used_names)
+
+def aa_file_source(fp, fasta_dir, seq_chars=6, prefix='manual_entry', suffix='af2', delim='-', extension='fasta', jobs=1, atomic=False):
+    """
+    Yield a Sample for every amino acid string in a file, writing each to its own FASTA file in fasta_dir
+    Each line is either a sequence, named like string_source samples, or a tab-separated name and sequence. Blank lines are skipped.
+    Samples whose sanitised names clash are renamed with a running index (see _aa_string_sample)
+    jobs, atomic: See make_fasta
+    """
+    yield from _write_fasta_batches(_aa_file_samples(fp, fasta_dir, seq_chars, prefix, suffix, delim, extension), jobs=jobs, atomic=atomic)
+
+def stdin_source(fp, fasta_dir, prefix='manual_entry', suffix='af2', delim='-', extension='fasta', jobs=1, atomic=False):
+    """
+    Yield a Sample for every record of a FASTA stream, writing each record to its own FASTA file in fasta_dir
+    The file of each record is named after its sanitised sample name (see file_name). Records whose sanitised names clash
+    are renamed with a running index (see _aa_string_sample)
+    jobs, atomic: See make_fasta
+    """
+    used_names = {}
+    samples = (_aa_string_sample(i.data, fasta_dir, name=i.name, prefix=prefix, suffix=suffix, delim=delim, extension=extension, used_names=used_names)
+        for i in iter_fasta(fp, read_data=True))
+    yield from _write_fasta_batches(samples, jobs=jobs, atomic=atomic)
+
+def parse_files(paths, read_data=True, single_line=False, jobs=None, processes=False, cache=None, lazy=False):
+    """
+    Yield the samples of every FASTA file in paths, in order (see read_fasta_files)
+    cache: Optional SampleCache. Files unchanged since they were cached are not parsed again
+    lazy: Leave sequences in the memory mapped files until they are used (see iter_fasta)
+    """
+    if cache is not None:
+        from samplesheetutils.utils.cache import cached_fasta_files
+        fasta_files = cached_fasta_files(paths, cache, read_data=read_data, single_line=single_line, jobs=jobs, processes=processes, lazy=lazy)
+    else:
+        fasta_files = read_fasta_files(paths, read_data=read_data, single_line=single_line, jobs=jobs, processes=processes, lazy=lazy)
+
+    for fasta_data in fasta_files:
+        yield from fasta_data
+
+def attach_msas(samples, msa_index, counts=None):
+    """
+    Set the msa of each sample from a dictionary of sample names to MSA paths (see index_msa_dir)
+    samples: Iterable of Sample objects
+    msa_index: Dictionary mapping sample names to MSA paths
+    counts: Optional Counter, whose "found" and "missing" entries are incremented for each sample
+    """
+    for sample in samples:
+        sample.msa = msa_index.get(sample.name)
+        if counts is not None:
+            counts["found" if sample.msa is not None else "missing"] += 1
+        yield sample
+
+def iter_files(samples):
+    """
+    Yield the path and the list of samples of each FASTA file, from samples in file order (see parse_files)
+    """
+    for path, file_samples in groupby(samples, key=attrgetter("path")):
+        yield path, list(file_samples)
+
+def group_by_file(samples):
+    """
+    Yield one Sample per FASTA file from samples in file order (see parse_files), for samplesheets with a row per file
+    The sample is named after the file's first record, and its data is the sequence of every record joined by ':',
+    the ColabFold notation for the chains of a complex
+    """
+    for path, file_samples in iter_files(samples):
+        yield Sample(file_samples[0].name, path, ":".join(i.data for i in file_samples))
+
+def sequence_digest(data):
+    """
+    Content hash of a sequence, used to find identical sequences without keeping them in memory
+    """
+    # Imported here, as hashlib takes a few milliseconds to import and only deduplication and SQLite samplesheets need it
+    from hashlib import blake2b
+    return blake2b(data.encode(), digest_size=16).digest()
+
+def dedupe_samples(samples, mapping_fp=None, counts=None):
+    """
+    Yield only the first sample of every distinct sequence, dropping samples whose sequence was already seen
+    Only a 16 byte digest and the name and path of each distinct sequence are kept, never the sequences themselves
+    samples: Iterable of Sample objects with amino acid data
+    mapping_fp: Optional open file object. A tab-separated row of name, path, canonical name, canonical path and
+        sequence digest is written for every sample, mapping it to the sample kept in its place (itself, if it was kept)
+    counts: Optional Counter, whose "unique" and "duplicate" entries are incremented for each sample
+    """
+    canonical = {}
+    if mapping_fp is not None:
+        mapping_fp.write("name\tpath\tcanonical_name\tcanonical_path\tsequence_hash\n")
+
+    for sample in samples:
+        digest = sequence_digest(sample.data)
+        kept = canonical.get(digest)
+        unique = kept is None
+        if unique:
+            kept = canonical[digest] = (sample.name, sample.path)
+        if mapping_fp is not None:
+            mapping_fp.write(f"{sample.name}\t{sample.path}\t{kept[0]}\t{kept[1]}\t{digest.hex()}\n")
+        if counts is not None:
+            counts["unique" if unique else "duplicate"] += 1
+        if unique:
+            yield sample
+
+# Extensions of compressed FASTA files, removed along with the FASTA extension when naming per-file outputs
+COMPRESSED_EXTENSIONS = (".gz", ".bgz", ".bz2", ".xz")
+
+def per_file_path(fasta_path, input_dir, output_dir, extension=".yaml"):
+    """
+    Path of the output file of a FASTA file, at the same place relative to output_dir as the FASTA file is to input_dir
+    e.g. input/sub/A1.fasta.gz becomes output/sub/A1.yaml
+    """
+    relative_path = os.path.relpath(fasta_path, input_dir)
+    if relative_path.endswith(COMPRESSED_EXTENSIONS):
+        relative_path = os.path.splitext(relative_path)[0]
+    return os.path.join(output_dir, os.path.splitext(relative_path)[0] + extension)
+
+def _unique_path(path, used_paths):
+    """
+    Return path, or path with a running index before its extension if it was already used (e.g. out/A1.1.yaml), and mark it as used
+    used_paths: Dictionary of the paths already given out, each mapped to the next index to try for it
+    """
+    if path in used_paths:
+        stem, extension = os.path.splitext(path)
+        index = used_paths[path]
+        while f"{stem}.{index}{extension}" in used_paths:
+            index += 1
+        used_paths[path] = index + 1
+        unique_path = f"{stem}.{index}{extension}"
+        logger.warning(f"{path} is already the output of another file, writing to {unique_path} instead")
+        path = unique_path
+    used_paths[path] = 1
+    return path
+
+def _write_yaml_file(path, samples, atomic):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    write_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp" if atomic else path
+    try:
+        with open(write_path, "x" if atomic else "w") as fp:
+            create_yaml_boltz(samples, fp, chain_ids=True)
+        if atomic:
+            os.replace(write_path, path)
+    except BaseException:
+        if atomic and os.path.exists(write_path):
+            os.remove(write_path)
+        raise
+    return path
+
+def write_yaml_per_file(samples, input_dir, output_dir, manifest_fp=None, jobs=None, atomic=False):
+    """
+    Write a Boltz YAML document for every FASTA file, with each record of the file as a chain of the complex (see create_yaml_boltz).
+    Chains are given the ids A, B, C... in record order, so ids never repeat within a document
+    Files are written by a pool of threads as the samples are parsed, so the first documents are ready before the last files are read
+    samples: Iterable of Sample objects in file order (see parse_files), with MSAs already attached
+    input_dir, output_dir: Each document is placed in output_dir as its FASTA file is in input_dir (see per_file_path).
+        FASTA files that map to the same document, such as A1.fa and A1.fasta.gz, get a running index before the extension (A1.1.yaml)
+    manifest_fp: Optional open file object. A tab-separated row of the document path, FASTA path, number of chains, number of
+        residues and number of chains with an MSA is written and flushed as each document is written, in input order
+    jobs: Number of documents written at once. Defaults to the number of available cores
+    atomic: Write each document under a temporary name and rename it into place, so a document is never seen half written
+    Returns the number of documents written
+    """
+    if jobs is None:
+        jobs = default_jobs()
+
+    if manifest_fp is not None:
+        manifest_fp.write("yaml\tfasta\tchains\tresidues\tmsas\n")
+        manifest_fp.flush()
+
+    def written(path, fasta_path, file_samples):
+        if manifest_fp is not None:
+            residues = sum(len(i.data) for i in file_samples)
+            msas = sum(1 for i in file_samples if i.msa)
+            manifest_fp.write(f"{path}\t{fasta_path}\t{len(file_samples)}\t{residues}\t{msas}\n")
+            manifest_fp.flush()
+
+    # Paths are made unique as files are submitted, so two threads never write to the same document
+    used_paths = {}
+    count = 0
+    if jobs <= 1:
+        for fasta_path, file_samples in iter_files(samples):
+            path = _unique_path(per_file_path(fasta_path, input_dir, output_dir), used_paths)
+            written(_write_yaml_file(path, file_samples, atomic), fasta_path, file_samples)
+            count += 1
+        return count
+
+    from concurrent.futures import ThreadPoolExecutor
+    # Only a few documents per worker are in flight at once, like read_fasta_files
+    max_pending = jobs * 4
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for fasta_path, file_samples in iter_files(samples):
+            path = _unique_path(per_file_path(fasta_path, input_dir, output_dir), used_paths)
+            future = executor.submit(_write_yaml_file, path, file_samples, atomic)
+            pending.append((future, fasta_path, file_samples))
+            if len(pending) >= max_pending:
+                future, done_path, done_samples = pending.popleft()
+                written(future.result(), done_path, done_samples)
+                count += 1
+        while pending:
+            future, done_path, done_samples = pending.popleft()
+            written(future.result(), done_path, done_samples)
+            count += 1
+
+    return count
+
+@contextmanager
+def replacing_file(path):
+    """
+    Open a file for writing under a temporary name, renamed to path once the block completes
+    Samplesheets are written as samples stream in, so a sample failing validation half way would otherwise leave a truncated
+    file behind. If the block raises, the temporary file is removed, and any existing file at path is left as it was
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w") as fp:
+            yield fp
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def write_samplesheet(samples, output_format, fp, seq_header='sequence', fasta_header='fasta'):
+    """
+    Write samples to a samplesheet in one of OUTPUT_EXTENSIONS' formats
+    samples: Iterable of Sample objects. It is consumed as the samplesheet is written
+    output_format: csv, json, jsonl or yaml
+    fp: Open file object to write to
+    seq_header, fasta_header: Column names of the csv format
+    """
+    if output_format == "csv":
+        create_csv(samples, seq_header, fasta_header, fp)
+    elif output_format == "json":
+        create_json(samples, fp)
+    elif output_format == "jsonl":
+        create_jsonl(samples, fp)
+    elif output_format == "yaml":
+        create_yaml_boltz(samples, fp)
+    else:
+        raise ValueError(f"Unknown samplesheet format: {output_format}")
@@ -1,14 +1,100 @@
+from array import array
+import sys
+
 class Sample:
+    __slots__ = ("name", "path", "data", "msa")
+
     def __init__(self, name, path, data, msa = None):
         self.name = name
         self.path = path
         self.data = data
         self.msa = msa
 
+# Whitespace other than line breaks. Only the ends of each sequence line are stripped of it, like iter_fasta does
+_LINE_WHITESPACE = b" \t\x0b\x0c"
+
+class LazySample(Sample):
+    """
+    Sample whose sequence is left in its memory mapped FASTA file until data is read
+    data is decoded from the mapping on every access rather than stored, so sequences are not held in memory between
+    parsing and writing, and consumers that only need names never decode them. Assigning data stores it like a Sample
+    mapping: Memory mapped FASTA file, shared by every sample of the file
+    start, end: Byte range of the record's sequence lines in the mapping
+    encoding: Text encoding of the file
+    """
+    __slots__ = ("_mapping", "_start", "_end", "_encoding", "_data")
+
+    def __init__(self, name, path, mapping, start, end, encoding="utf-8", msa = None):
+        super().__init__(name, path, None, msa)
+        self._mapping = mapping
+        self._start = start
+        self._end = end
+        self._encoding = encoding
+
+    @property
+    def data(self):
+        if self._data is not None:
+            return self._data
+        data = self._mapping[self._start:self._end].translate(None, b"\r\n")
+        # Most sequences have no whitespace left once line breaks are removed, and need no per-line stripping
+        if data.isascii() and len(data.translate(None, _LINE_WHITESPACE)) == len(data):
+            return data.decode(self._encoding)
+        text = self._mapping[self._start:self._end].decode(self._encoding)
+        lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        return "".join(i.strip() for i in lines)
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+class SampleTable:
+    """
+    Compact, column-oriented storage for a large number of samples
+    Names, paths and MSA paths are kept in interned lists, and every sequence is stored in a single shared buffer,
+    so no Sample object is kept per sample. Iterating over the table yields Sample objects, so it can be passed to any writer
+    samples: Optional iterable of Sample objects to fill the table with
+    """
+    def __init__(self, samples=()):
+        self.names = []
+        self.paths = []
+        self.msas = []
+        self._sequences = bytearray()
+        # Sequence i is _sequences[_offsets[i]:_offsets[i + 1]]
+        self._offsets = array("Q", [0])
+        self.extend(samples)
+
+    def append(self, sample):
+        self.names.append(sys.intern(sample.name))
+        self.paths.append(sys.intern(sample.path))
+        self.msas.append(sys.intern(sample.msa) if sample.msa else sample.msa)
+        self._sequences += sample.data.encode()
+        self._offsets.append(len(self._sequences))
+
+    def extend(self, samples):
+        for sample in samples:
+            self.append(sample)
+
+    def sequence(self, index):
+        return self._sequences[self._offsets[index]:self._offsets[index + 1]].decode()
+
+    def sequence_length(self, index):
+        return self._offsets[index + 1] - self._offsets[index]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        # Normalises negative indexes, and raises IndexError when out of range
+        index = range(len(self))[index]
+        return Sample(self.names[index], self.paths[index], self.sequence(index), self.msas[index])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
 def sample_name(aa_seq, seq_chars=6):
     trunc_aa_seq = aa_seq[:min(seq_chars, len(aa_seq))]
     return trunc_aa_seq
 
 def file_name(sample_id, prefix='manual_entry', suffix='af2', delim='-', extension='fasta'):
     return ''.join([prefix, delim, sample_id, delim, suffix, '.', extension])
-
@@ -0,0 +1,94 @@
+import heapq, os
+
+def residue_count(sample):
+    """
+    Number of residues of a sample. Chains joined by ':' (see group_by_file) are counted together, without the separators
+    """
+    data = sample.data
+    return len(data) - data.count(":")
+
+def balanced_shards(weights, shards):
+    """
+    Split items into a fixed number of shards with totals as even as possible, using the longest processing time first rule:
+    items are placed, heaviest first, in the shard with the smallest total so far
+    weights: List of item weights
+    shards: Number of shards
+    Returns a list of shards, each a list of item indexes in their original order
+    """
+    if shards < 1:
+        raise ValueError(f"Number of shards must be at least 1, not {shards}")
+
+    assigned = [[] for _ in range(shards)]
+    # (total weight, shard index), so ties go to the earliest shard
+    totals = [(0, i) for i in range(shards)]
+
+    for item in sorted(range(len(weights)), key=lambda i: -weights[i]):
+        total, shard = totals[0]
+        assigned[shard].append(item)
+        heapq.heapreplace(totals, (total + weights[item], shard))
+
+    for shard in assigned:
+        shard.sort()
+    return assigned
+
+def budget_shards(weights, max_weight):
+    """
+    Split items into as few shards as the budget allows, with totals kept even
+    Items are placed, heaviest first, in the shard with the smallest total so far, and a new shard is opened when they do not fit.
+    An item heavier than the budget gets a shard of its own
+    weights: List of item weights
+    max_weight: Largest total weight of a shard
+    Returns a list of shards, each a list of item indexes in their original order
+    """
+    if max_weight < 1:
+        raise ValueError(f"Shard budget must be at least 1, not {max_weight}")
+
+    assigned = []
+    totals = []
+
+    for item in sorted(range(len(weights)), key=lambda i: -weights[i]):
+        if totals and totals[0][0] + weights[item] <= max_weight:
+            total, shard = totals[0]
+            heapq.heapreplace(totals, (total + weights[item], shard))
+        else:
+            shard = len(assigned)
+            assigned.append([])
+            heapq.heappush(totals, (weights[item], shard))
+        assigned[shard].append(item)
+
+    for shard in assigned:
+        shard.sort()
+    return assigned
+
+def shard_samples(samples, shards=None, max_residues=None, sort_by_length=False):
+    """
+    Split samples into shards of balanced total length, so jobs running one shard each finish at about the same time
+    samples: Iterable of Sample objects with amino acid data. It is read in full
+    shards: Number of shards (see balanced_shards)
+    max_residues: Largest number of residues in a shard (see budget_shards). Used instead of shards when set
+    sort_by_length: Order the samples of each shard from longest to shortest, instead of in their original order
+    Returns a list of shards, each a list of Sample objects
+    """
+    samples = list(samples)
+    lengths = [residue_count(i) for i in samples]
+
+    if max_residues is not None:
+        # No samples still make one, empty, samplesheet
+        assigned = budget_shards(lengths, max_residues) or [[]]
+    else:
+        assigned = balanced_shards(lengths, shards or 1)
+
+    if sort_by_length:
+        for shard in assigned:
+            # Stable, so samples of the same length keep their original order
+            shard.sort(key=lambda i: -lengths[i])
+
+    return [[samples[i] for i in shard] for shard in assigned]
+
+def shard_path(path, shard, shards):
+    """
+    Path of a shard's samplesheet: the shard number, zero padded so the files sort in order, before the extension of path
+    e.g. samplesheet.csv becomes samplesheet.03.csv for shard 3 of 12
+    """
+    stem, extension = os.path.splitext(path)
+    return f"{stem}.{str(shard).zfill(len(str(shards - 1)))}{extension}"
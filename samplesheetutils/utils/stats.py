@@ -0,0 +1,181 @@
+from contextlib import contextmanager, nullcontext
+import sys, time
+
+def peak_rss_kb():
+    """
+    Peak resident memory of this process so far in kilobytes, or None where the resource module is unavailable
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, and kilobytes elsewhere
+    return peak_rss // 1024 if sys.platform == "darwin" else peak_rss
+
+class Stats:
+    """
+    Per-stage timing and throughput counters
+    Stages nest: when a wrapped generator pulls from another wrapped generator, the inner stage's time is
+    subtracted from the outer one, so every stage reports only the time spent in its own code
+    """
+    enabled = True
+
+    def __init__(self):
+        self.stages = {}
+        self.started = time.perf_counter()
+        # Time spent in nested stages, for each stage currently running
+        self._child_seconds = []
+
+    def _stage(self, name):
+        if name not in self.stages:
+            self.stages[name] = {"seconds": 0.0, "files": 0, "records": 0, "bytes": 0, "peak_rss_kb": None}
+        return self.stages[name]
+
+    def _enter(self):
+        self._child_seconds.append(0.0)
+        return time.perf_counter()
+
+    def _exit(self, stage, start):
+        elapsed = time.perf_counter() - start
+        stage["seconds"] += elapsed - self._child_seconds.pop()
+        if self._child_seconds:
+            self._child_seconds[-1] += elapsed
+
+    def add(self, name, files=0, records=0, bytes_read=0):
+        stage = self._stage(name)
+        stage["files"] += files
+        stage["records"] += records
+        stage["bytes"] += bytes_read
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time a block of code as a stage
+        """
+        stage = self._stage(name)
+        start = self._enter()
+        try:
+            yield stage
+        finally:
+            self._exit(stage, start)
+            stage["peak_rss_kb"] = peak_rss_kb()
+
+    def wrap(self, name, iterable, unit="records", size=None, file=None):
+        """
+        Yield from an iterable, timing every item it produces as the named stage
+        unit: Counter incremented per item, records or files
+        size: Optional function returning the number of bytes of an item, or of a file if file is set
+        file: Optional function returning the file an item was read from, for records read in file order.
+            Files are also counted, once per run of items from the same file
+        """
+        # The stage is registered now, rather than on the first item, so stages are reported in pipeline order
+        return self._wrap(self._stage(name), iter(iterable), unit, size, file)
+
+    def _wrap(self, stage, iterator, unit, size, file):
+        last_file = None
+        while True:
+            start = self._enter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                stage["peak_rss_kb"] = peak_rss_kb()
+                return
+            finally:
+                self._exit(stage, start)
+            stage[unit] += 1
+            if file is not None:
+                item_file = file(item)
+                if item_file != last_file:
+                    last_file = item_file
+                    stage["files"] += 1
+                    if size is not None:
+                        stage["bytes"] += size(item_file)
+            elif size is not None:
+                stage["bytes"] += size(item)
+            yield item
+
+    def count(self, name, iterable, unit="records"):
+        """
+        Yield from an iterable, counting its items in the named stage without timing them, for stages timed with stage()
+        """
+        stage = self._stage(name)
+        for item in iterable:
+            stage[unit] += 1
+            yield item
+
+    def to_dict(self):
+        stages = {}
+        for name, stage in self.stages.items():
+            stages[name] = dict(stage)
+            for counter in ("files", "records", "bytes"):
+                stages[name][f"{counter}_per_second"] = stage[counter] / stage["seconds"] if stage["seconds"] else None
+        return {
+            "seconds": time.perf_counter() - self.started,
+            "peak_rss_kb": peak_rss_kb(),
+            "stages": stages,
+        }
+
+    def write_summary(self, fp):
+        summary = self.to_dict()
+        fp.write(f"{'stage':<16} {'seconds':>9} {'files':>9} {'files/s':>10} {'records':>10} {'records/s':>11} {'MB':>9} {'MB/s':>8}\n")
+        for name, stage in summary["stages"].items():
+            fp.write(f"{name:<16} {stage['seconds']:>9.3f} {stage['files']:>9} {stage['files_per_second'] or 0:>10.0f} "
+                f"{stage['records']:>10} {stage['records_per_second'] or 0:>11.0f} {stage['bytes'] / 1e6:>9.1f} {(stage['bytes_per_second'] or 0) / 1e6:>8.1f}\n")
+        fp.write(f"{'total':<16} {summary['seconds']:>9.3f}  peak memory {summary['peak_rss_kb'] or 0} KB\n")
+        fp.flush()
+
+    def write_json(self, fp):
+        import json
+        json.dump(self.to_dict(), fp, indent=2)
+        fp.flush()
+
+class NullStats:
+    """
+    Stand-in for Stats when instrumentation is disabled. Iterables are passed through untouched
+    """
+    enabled = False
+
+    def add(self, name, files=0, records=0, bytes_read=0):
+        pass
+
+    def stage(self, name):
+        return nullcontext()
+
+    def wrap(self, name, iterable, unit="records", size=None, file=None):
+        return iterable
+
+    def count(self, name, iterable, unit="records"):
+        return iterable
+
+NULL_STATS = NullStats()
+
+def report_stats(stats, summary=False, json_path=None):
+    """
+    Print a stage summary to stderr and/or write it as JSON, depending on the --stats and --stats-json options
+    """
+    if not stats.enabled:
+        return
+    if summary:
+        stats.write_summary(sys.stderr)
+    if json_path:
+        with open(json_path, "w") as fp:
+            stats.write_json(fp)
+
+@contextmanager
+def profiled(path=None):
+    """
+    Profile the enclosed block with cProfile and dump the statistics to path. Does nothing if path is unset
+    """
+    if not path:
+        yield
+        return
+
+    import cProfile
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
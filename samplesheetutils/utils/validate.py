@@ -0,0 +1,142 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The 20 standard amino acids, then the other IUPAC protein codes (ambiguous residues, selenocysteine, pyrrolysine and unknown)
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+NONSTANDARD_AMINO_ACIDS = "BJOUXZ"
+PROTEIN_ALPHABET = AMINO_ACIDS + NONSTANDARD_AMINO_ACIDS
+# Sequences made only of these are most likely DNA or RNA
+NUCLEOTIDES = "ACGTUN"
+# Shortest sequence reported as a possible nucleotide sequence, as short peptides can be made of these letters too
+NUCLEOTIDE_MIN_LENGTH = 20
+# Residues buffered before the composition counters are updated
+COMPOSITION_BUFFER_SIZE = 1 << 20
+
+# Bytes deleted from a sequence to leave only its unusual characters, in a single bytes.translate call. ':' separates chains
+_STANDARD_BYTES = (AMINO_ACIDS + ":").encode("ascii")
+_NONSTANDARD_BYTES = NONSTANDARD_AMINO_ACIDS.encode("ascii")
+_NUCLEOTIDE_BYTES = (NUCLEOTIDES + ":").encode("ascii")
+
+def check_residues(data):
+    """
+    Return the distinct characters of a sequence that are not amino acid codes, as a sorted string, and its number of non-standard residues
+    Sequences are checked with bulk byte operations rather than a loop over their residues: one bytes.translate call deletes
+    every standard residue, and only the few characters left are looked at
+    data: Amino acid sequence. Chains may be separated by ':'
+    """
+    if not data.isascii():
+        unusual = [i for i in data if i not in AMINO_ACIDS and i != ":"]
+        invalid = "".join(sorted(set(unusual) - set(NONSTANDARD_AMINO_ACIDS)))
+        return invalid, sum(1 for i in unusual if i in NONSTANDARD_AMINO_ACIDS)
+
+    unusual = data.encode("ascii").translate(None, _STANDARD_BYTES)
+    if not unusual:
+        return "", 0
+    invalid = unusual.translate(None, _NONSTANDARD_BYTES)
+    return "".join(sorted(set(invalid.decode("ascii")))), len(unusual) - len(invalid)
+
+def looks_like_nucleotides(data):
+    """
+    Check if a sequence is long enough, and made only of nucleotide letters, to most likely be DNA or RNA rather than protein
+    """
+    return len(data) >= NUCLEOTIDE_MIN_LENGTH and data.isascii() and not data.encode("ascii").translate(None, _NUCLEOTIDE_BYTES)
+
+class SequenceSummary:
+    """
+    Sequence count, length range, non-standard residue count and problems of the samples in a samplesheet
+    composition: Also count every residue. Sequences are buffered as bytes, and each residue is counted over the whole buffer at once.
+        This takes a pass over the buffer per residue, so is several times slower than the other checks
+    """
+    def __init__(self, composition=False):
+        self.samples = 0
+        self.residues = 0
+        self.nonstandard = 0
+        self.shortest = None
+        self.longest = None
+        self.invalid = 0
+        self.nucleotide = 0
+        self.composition = dict.fromkeys(PROTEIN_ALPHABET, 0) if composition else None
+        self._buffer = bytearray()
+
+    def add(self, sample, invalid="", nonstandard=0, nucleotide=False):
+        """
+        Count a sample, with the results of check_residues and looks_like_nucleotides for it
+        """
+        data = sample.data
+        length = len(data) - data.count(":")
+        self.samples += 1
+        self.residues += length
+        self.nonstandard += nonstandard
+        if self.shortest is None or length < self.shortest:
+            self.shortest = length
+        if self.longest is None or length > self.longest:
+            self.longest = length
+        if invalid:
+            self.invalid += 1
+        if nucleotide:
+            self.nucleotide += 1
+
+        if self.composition is not None and data.isascii():
+            self._buffer += data.encode("ascii")
+            if len(self._buffer) >= COMPOSITION_BUFFER_SIZE:
+                self._count_buffer()
+
+    def _count_buffer(self):
+        for residue in self.composition:
+            self.composition[residue] += self._buffer.count(residue.encode("ascii"))
+        self._buffer.clear()
+
+    def to_dict(self):
+        summary = {
+            "samples": self.samples,
+            "residues": self.residues,
+            "nonstandard_residues": self.nonstandard,
+            "shortest": self.shortest,
+            "longest": self.longest,
+            "mean_length": self.residues / self.samples if self.samples else None,
+            "invalid": self.invalid,
+            "nucleotide": self.nucleotide,
+        }
+        if self.composition is not None:
+            self._count_buffer()
+            summary["composition"] = {residue: count for residue, count in self.composition.items() if count}
+        return summary
+
+    def summary_lines(self):
+        """
+        Human readable summary, as a list of lines
+        """
+        summary = self.to_dict()
+        if not summary["samples"]:
+            return ["Validated 0 sequences"]
+        lines = [f"Validated {summary['samples']} sequences of {summary['shortest']} to {summary['longest']} residues "
+            f"(mean {summary['mean_length']:.1f}, total {summary['residues']}, {summary['nonstandard_residues']} non-standard): "
+            f"{summary['invalid']} with invalid residues, {summary['nucleotide']} that look like nucleotide sequences"]
+        if "composition" in summary and summary["residues"]:
+            composition = sorted(summary["composition"].items(), key=lambda i: -i[1])
+            lines.append("Composition: " + " ".join(f"{residue} {100 * count / summary['residues']:.1f}%" for residue, count in composition))
+        return lines
+
+def validate_samples(samples, strict=False, summary=None):
+    """
+    Check that every sample is an amino acid sequence, passing the samples through
+    samples: Iterable of Sample objects with amino acid data
+    strict: Raise ValueError on the first sample with characters that are not amino acid codes, or that looks like a nucleotide sequence.
+        Otherwise a warning is logged for each such sample, and it is kept
+    summary: Optional SequenceSummary, updated with every sample
+    """
+    for sample in samples:
+        data = sample.data
+        invalid, nonstandard = check_residues(data)
+        nucleotide = not invalid and looks_like_nucleotides(data)
+
+        if invalid or nucleotide:
+            problem = f"invalid residues {invalid!r}" if invalid else "only nucleotide letters"
+            if strict:
+                raise ValueError(f"Sample {sample.name} in {sample.path} has {problem}")
+            logger.warning(f"Sample {sample.name} in {sample.path} has {problem}")
+
+        if summary is not None:
+            summary.add(sample, invalid, nonstandard, nucleotide)
+        yield sample
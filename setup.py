@@ -5,7 +5,7 @@ setup(
     version="1.0",
     author="Nathan Glades",
     author_email="n.glades@unsw.edu.au",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     description="Collection of utilities for creating and transforming samplesheets and samples",
     install_requires=["pyyaml==6.0.1"],
     